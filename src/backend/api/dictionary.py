@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from typing import Annotated, Dict
 from sqlmodel import Session
 
@@ -32,4 +32,7 @@ def get_word_definition_endpoint(
         Dictionary with word definition
     """
     def_ =  get_word_definition([word], language, session, include_conjugations)
-    return def_[0] if len(def_) > 0 else {}
+    if not def_:
+        return {}
+    # Serialize in pydantic-core; FastAPI's jsonable_encoder would walk the nested entries in Python
+    return Response(content=def_[0].model_dump_json(), media_type="application/json")
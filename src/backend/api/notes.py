@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, Query, UploadFile, File, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from typing import Annotated, List
 from sqlmodel import Session
 
@@ -56,8 +56,11 @@ def delete_note_endpoint(session: SessionDep, id: int):
 
 @router.post('/{id}/block')
 def send_note_block_endpoint(session: SessionDep, id: int, note_block: NoteBlockCreate):
-    """Send a note block to a note and get a response."""
-    return send_note_block(session, id, note_block)
+    """Send a note block to a note and stream the response as server-sent events."""
+    return StreamingResponse(
+        send_note_block(session, id, note_block),
+        media_type="text/event-stream",
+    )
 
 
 @router.post('/{id}/question')
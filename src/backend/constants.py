@@ -65,4 +65,14 @@ SYSTEM_PROMPT = '''
 
 '''
 
-# cool if I have special UI for fixing mistakes, and button
\ No newline at end of file
+# cool if I have special UI for fixing mistakes, and button
+
+
+# Shared first message of every tutor prompt. Reusing one unchanged object keeps the
+# prompt prefix byte-identical across requests so OpenAI prompt caching can hit.
+SYSTEM_MESSAGE = {"role": "developer", "content": SYSTEM_PROMPT}
+
+
+SUMMARY_PROMPT = '''
+Summarize the following Spanish-learning note history. Keep the words, grammar points, corrections and open questions the learner worked on, so the conversation can continue without the full history. Answer with the summary only.
+'''
@@ -1,6 +1,69 @@
 import os
+import orjson
+from sqlalchemy import DateTime, inspect, text
 from sqlmodel import SQLModel, Session, create_engine
-from typing import Generator, Optional
+from typing import Any, Generator, List, Optional, Tuple
+
+
+def json_serializer(value: Any) -> str:
+    """Serialize JSON column values with orjson instead of stdlib json."""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def json_deserializer(value: str | bytes) -> Any:
+    """Deserialize JSON column values with orjson instead of stdlib json."""
+    return orjson.loads(value)
+
+
+def create_missing_indexes(engine) -> None:
+    """
+    Create model indexes the database doesn't have yet.
+
+    create_all skips tables that already exist, so indexes added to a model later would
+    never reach an existing database; checkfirst makes this safe to run on every start.
+    """
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
+def _naive_timestamp_columns(engine) -> List[Tuple[str, str]]:
+    """List the (table, column) pairs a model declares timezone-aware but the database stores naive."""
+    inspector = inspect(engine)
+    columns = []
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"]: column["type"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if (
+                isinstance(column.type, DateTime) and column.type.timezone
+                and column.name in existing and not getattr(existing[column.name], "timezone", False)
+            ):
+                columns.append((table.name, column.name))
+    return columns
+
+
+def convert_naive_timestamp_columns(engine) -> None:
+    """
+    Convert naive timestamp columns to timestamptz where the model is timezone-aware.
+
+    Like indexes, create_all never changes the type of an existing column. The naive
+    values were written as UTC, so they are converted as such; only PostgreSQL keeps
+    the two types apart, and converted columns are skipped on the next start.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    columns = _naive_timestamp_columns(engine)
+    if not columns:
+        return
+    with engine.begin() as connection:
+        for table, column in columns:
+            connection.execute(text(
+                f'ALTER TABLE "{table}" ALTER COLUMN "{column}" '
+                f'TYPE timestamptz USING "{column}" AT TIME ZONE \'UTC\''
+            ))
+
 
 class DatabaseManager:
     """Singleton database manager for the application."""
@@ -31,7 +94,11 @@ class DatabaseManager:
             f"@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
         )
 
-        self._engine = create_engine(database_url)
+        self._engine = create_engine(
+            database_url,
+            json_serializer=json_serializer,
+            json_deserializer=json_deserializer,
+        )
     
     @property
     def engine(self):
@@ -41,10 +108,14 @@ class DatabaseManager:
     def create_db_and_tables(self):
         """Create database and tables if they don't exist."""
         SQLModel.metadata.create_all(self._engine)
+        convert_naive_timestamp_columns(self._engine)
+        create_missing_indexes(self._engine)
     
     def get_session(self) -> Generator[Session, None, None]:
         """Get a database session."""
-        with Session(self._engine) as session:
+        # Sessions live for one request and nothing re-reads rows written by others after
+        # committing, so keep loaded attributes instead of reloading them on next access
+        with Session(self._engine, expire_on_commit=False) as session:
             yield session
 
 # Global instance
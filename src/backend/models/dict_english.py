@@ -11,7 +11,7 @@ from .shared import Example, Definition, AudioInfo
 class Dictionary(SQLModel, table=True):
     """Model for cached dictionary entries."""
     id: int | None = Field(default=None, primary_key=True)
-    word: str
+    word: str = Field(index=True)
     word_meta: dict = Field(default_factory=dict, sa_column=Column(JSON))
 
 
@@ -58,7 +58,8 @@ class EnglishWordDefinition(Definition):
 
     @classmethod
     def init_empty(cls, word):
-        return EnglishWordDefinition(
+        # Nothing to validate in an empty definition; misses are common, so skip it
+        return cls.model_construct(
             word=word,
             entries=[],
             audio=None,
@@ -66,11 +67,11 @@ class EnglishWordDefinition(Definition):
         )
 
     def get_examples(self):
-        examples = []
-        for entry in self.entries:
-            for g in entry.pos_groups:
-                for s in g.senses:
-                    for t in s.translations:
-                        for e in t.examples:
-                            examples.append(e)
-        return examples
+        return [
+            e
+            for entry in self.entries
+            for g in entry.pos_groups
+            for s in g.senses
+            for t in s.translations
+            for e in t.examples
+        ]
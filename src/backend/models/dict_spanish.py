@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+import sys
+from pydantic import BaseModel, ConfigDict, PrivateAttr, field_validator
 from typing import List, Dict, Optional, Any
 
 from sqlmodel import JSON, Column, Field, SQLModel
@@ -6,9 +7,20 @@ from sqlmodel import JSON, Column, Field, SQLModel
 from .shared import Example, Definition, AudioInfo
 
 
+# Core schemas for these models are built on first validation rather than at
+# import time, so processes that never serve a Spanish lookup skip the cost.
+DEFERRED_BUILD = ConfigDict(defer_build=True)
+
+
+def intern_str(value: Any) -> Any:
+    """Intern strings drawn from a small closed vocabulary (POS names, pronouns, tenses)."""
+    return sys.intern(value) if isinstance(value, str) else value
+
 
 class Translation(BaseModel):
     """Translation information for a Spanish word."""
+    model_config = DEFERRED_BUILD
+
     translation: str
     examples: List[Example] = []
     context: str = ""
@@ -16,6 +28,8 @@ class Translation(BaseModel):
 
 class Sense(BaseModel):
     """Sense information for a Spanish word."""
+    model_config = DEFERRED_BUILD
+
     context_en: str
     context_es: str
     gender: Optional[str] = None
@@ -27,45 +41,81 @@ class Sense(BaseModel):
 
 class PosGroup(BaseModel):
     """Group of senses by part of speech for a Spanish word."""
+    model_config = DEFERRED_BUILD
+
     pos: str  # Name of the part of speech
     senses: List[Sense] = []
 
+    @field_validator('pos', mode='before')
+    @classmethod
+    def _intern_pos(cls, value: Any) -> Any:
+        return intern_str(value)
+
 
 class SpanishWordEntry(BaseModel):
     """Entry for a Spanish word."""
+    model_config = DEFERRED_BUILD
+
     word: str
     pos_groups: List[PosGroup] = []
 
 
 
 class ConjugationFormTranslation(BaseModel):
+    model_config = DEFERRED_BUILD
+
     word: str
     pronoun: str
 
+    @field_validator('pronoun', mode='before')
+    @classmethod
+    def _intern_pronoun(cls, value: Any) -> Any:
+        return intern_str(value)
+
 # Conjugation models
 
 
 class ConjugationForm(BaseModel):
     """A conjugation form for a specific pronoun."""
+    model_config = DEFERRED_BUILD
+
     forms: List[str]
     pronoun: str
     audio_query_string: str
     translations: list[ConjugationFormTranslation]
 
+    @field_validator('pronoun', mode='before')
+    @classmethod
+    def _intern_pronoun(cls, value: Any) -> Any:
+        return intern_str(value)
+
 
 class TenseConjugations(BaseModel):
     """Conjugations for a specific tense."""
+    model_config = DEFERRED_BUILD
+
     conjugations: Dict[str, ConjugationForm]  # pronoun -> conjugation
 
+    @field_validator('conjugations', mode='before')
+    @classmethod
+    def _intern_pronoun_keys(cls, value: Any) -> Any:
+        if isinstance(value, dict):
+            return {intern_str(key): conj for key, conj in value.items()}
+        return value
+
 
 class Participle(BaseModel):
     """Participle form of a verb."""
+    model_config = DEFERRED_BUILD
+
     spanish: str
     english: str
 
 
 class VerbConjugations(BaseModel):
     """Complete conjugation information for a verb."""
+    model_config = DEFERRED_BUILD
+
     infinitive: str
     translation: str
     is_reflexive: bool
@@ -74,37 +124,55 @@ class VerbConjugations(BaseModel):
     tenses: Dict[str, list[ConjugationForm]] = {}
     examples: List[Example] = []
 
+    @field_validator('tenses', mode='before')
+    @classmethod
+    def _intern_tense_keys(cls, value: Any) -> Any:
+        if isinstance(value, dict):
+            return {intern_str(key): forms for key, forms in value.items()}
+        return value
+
 
 # Combined word definition model
 class SpanishWordDefinition(Definition):
     """Definition for a Spanish word."""
+    model_config = DEFERRED_BUILD
+
     word: str
     entries: List[SpanishWordEntry]
     conjugations: Optional[VerbConjugations] = None
     spanish_audio: Optional[AudioInfo] = None
     english_audio: Optional[AudioInfo] = None
 
+    # Flattened examples, computed on the first get_examples() call
+    _examples_cache: Optional[List[Example]] = PrivateAttr(default=None)
+
     @classmethod
     def init_empty(cls, word):
-        return cls(
+        # Nothing to validate in an empty definition; misses are common, so skip it
+        return cls.model_construct(
             word=word,
             entries=[]
         )
 
     def get_examples(self):
-        examples = []
-        for entry in self.entries:
-            for g in entry.pos_groups:
-                for s in g.senses:
-                    for t in s.translations:
-                        for e in t.examples:
-                            examples.append(e)
-        return examples
+        if self._examples_cache is not None:
+            return self._examples_cache
+        self._examples_cache = [
+            e
+            for entry in self.entries
+            for g in entry.pos_groups
+            for s in g.senses
+            for t in s.translations
+            for e in t.examples
+        ]
+        return self._examples_cache
 
 
 # API request/response models
 class SpanishWordRequest(BaseModel):
     """Request for Spanish word information."""
+    model_config = ConfigDict(defer_build=True, frozen=True)
+
     word: str
     include_conjugations: bool = False
 
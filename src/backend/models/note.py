@@ -1,12 +1,27 @@
-from sqlmodel import SQLModel, Field, Column, JSON, Relationship
-from pydantic import BaseModel, Field as PydanticField, computed_field
-from datetime import datetime
+from sqlmodel import SQLModel, Field, Column, DateTime, Index, JSON, Relationship
+from pydantic import BaseModel, ConfigDict, Field as PydanticField, computed_field
+from datetime import datetime, timezone
 from typing import List, Literal, Optional, Union
 import re
 
 
+def utc_now() -> datetime:
+    """Return the current time as a timezone-aware UTC datetime."""
+    return datetime.now(timezone.utc)
+
+
+# Image reference in note content, e.g. "@image:12"
+IMAGE_REF_RE = re.compile(r'@image:(\d+)')
+
+
+# Request/response DTOs are never mutated after validation
+FROZEN_DTO = ConfigDict(frozen=True)
+
+
 class NoteBlock(BaseModel):
     """Schema representing a message stored in note history."""
+    model_config = FROZEN_DTO
+
     id: int
     role: Literal["user", "assistant", "system", "developer"]
     content: str  # Always string for backward compatibility
@@ -21,7 +36,7 @@ class NoteBlock(BaseModel):
     @property
     def image_ids(self) -> List[int]:
         """Parse image IDs from content dynamically - no storage needed."""
-        return [int(img_id) for img_id in re.findall(r'@image:(\d+)', self.content)]
+        return [int(img_id) for img_id in IMAGE_REF_RE.findall(self.content)]
 
 
 class Note(SQLModel, table=True):
@@ -48,6 +63,11 @@ class Note(SQLModel, table=True):
 
 class NoteImage(SQLModel, table=True):
     """Model for images attached to notes."""
+    # Serves per-note listing ordered by upload time; lookups by (id, note_id) use the primary key
+    __table_args__ = (
+        Index("ix_noteimage_note_id_uploaded_at", "note_id", "uploaded_at"),
+    )
+
     id: int | None = Field(default=None, primary_key=True)
     note_id: int = Field(foreign_key="note.id")
     filename: str = Field(index=True)
@@ -55,16 +75,28 @@ class NoteImage(SQLModel, table=True):
     file_path: str
     mime_type: str
     file_size: int
-    uploaded_at: datetime = Field(default_factory=datetime.utcnow)
+    uploaded_at: datetime = Field(default_factory=utc_now, sa_type=DateTime(timezone=True))
     
     note: Note = Relationship(back_populates="images")
 
+class NoteResponseCache(SQLModel, table=True):
+    """Cached assistant reply for an exact prompt, keyed by a hash of messages and model."""
+    key: str = Field(primary_key=True)
+    response: str
+    created_at: datetime = Field(
+        default_factory=utc_now, sa_type=DateTime(timezone=True), index=True
+    )  # Expired entries are purged by age
+
 class NoteListResponse(BaseModel):
+    model_config = FROZEN_DTO
+
     id: int 
     name: str
 
 class NoteImageResponse(BaseModel):
     """Response schema for note images."""
+    model_config = FROZEN_DTO
+
     id: int
     filename: str
     original_filename: str
@@ -77,17 +109,24 @@ class NoteImageResponse(BaseModel):
 
 class NoteBlockCreate(BaseModel):
     """Schema for creating note messages."""
+    model_config = FROZEN_DTO
+
     block: str
     is_note: bool = False
     image_ids: List[int] = PydanticField(default_factory=list)
+    regenerate: bool = False  # Skip the response cache, e.g. after deleting an unwanted reply
 
 
 class NoteBlockUpdate(BaseModel):
     """Schema for updating existing note messages."""
+    model_config = FROZEN_DTO
+
     block: Optional[str] = None
 
 
 class QuestionCreate(BaseModel):
     """Schema for creating a question about a note."""
+    model_config = FROZEN_DTO
+
     question: str
     parent_note_block_id: Optional[int] = None
\ No newline at end of file
@@ -15,14 +15,23 @@ import os
 import argparse
 import logging
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import json
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 # Add the parent directory to the Python path so we can import from the backend
 sys.path.append(str(Path(__file__).parent.parent))
 
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlmodel import create_engine, Session, select, text
-from backend.services.phrase_service import get_phrase_with_example_and_translation
+from backend.database import json_serializer, json_deserializer
+from backend.services.phrase_service import (
+    get_phrase_with_example_and_translation, save_generated_sentence
+)
 
 # Configure logging
 logging.basicConfig(
@@ -31,17 +40,149 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Number of wordlists fetched and committed per batch
+PAGE_SIZE = 100
+# Number of words looked up concurrently within a wordlist
+DEFAULT_WORKERS = 8
+# Translation memory shared across runs and wordlists
+DEFAULT_CACHE_PATH = "translation_cache.db"
+# Entries kept in the in-process layer of the translation memory
+MEMORY_CACHE_SIZE = 100_000
+TARGET_LANGUAGE = "en"
+PROFICIENCY = "intermediate"
+
 
-def is_old_format(words_json: str) -> bool:
+def is_old_format(words: list) -> bool:
     """Check if the wordlist is in old format (list of strings)."""
+    # Check if first item is a string (old format) vs dict (new format)
+    return bool(words) and isinstance(words[0], str)
+
+
+def is_complete_result(word_data: Dict[str, Any]) -> bool:
+    """
+    Whether a lookup produced every field for real.
+
+    Failed sentence generation falls back to the word itself as the example, and
+    failed translation parsing can leave fields empty; neither should be replayed.
+    """
+    return (
+        all(word_data.get(field) for field in ("word_translation", "example_phrase", "example_phrase_translation"))
+        and word_data["example_phrase"] != word_data.get("word")
+    )
+
+
+class TranslationCache:
+    """
+    Translation memory for the migration.
+    
+    Results of get_phrase_with_example_and_translation are persisted in a local
+    SQLite file keyed by (language, target language, proficiency, translator, word),
+    so reruns and words shared between wordlists skip the translation/LLM round-trips.
+    Only complete results are persisted; degraded ones are retried on the next run.
+    An in-process LRU layer serves repeats within a run without touching SQLite.
+    
+    Lookups run in worker threads and never write to the application database:
+    example sentences generated along the way are queued and saved by the main
+    thread through save_generated_sentences.
+    """
+    
+    def __init__(self, path: str, bind: Engine, use_gpt_translation: bool = False):
+        self.bind = bind
+        self.use_gpt_translation = use_gpt_translation
+        # Shared by the worker threads; sqlite3 connections are not, so serialize access
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._generated_sentences: List[Tuple[str, str]] = []
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS translation_cache (key TEXT PRIMARY KEY, payload JSON)"
+            )
+            self._conn.commit()
+        # Exceptions are not cached by lru_cache, so failed words are retried on next use
+        self.get = lru_cache(maxsize=MEMORY_CACHE_SIZE)(self._get_or_fetch)
+    
+    def _get_or_fetch(self, word_str: str, language: str) -> Dict[str, Any]:
+        translator = "gpt" if self.use_gpt_translation else "google"
+        key = f"{language}|{TARGET_LANGUAGE}|{PROFICIENCY}|{translator}|{word_str}"
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM translation_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row:
+            return json.loads(row[0])
+        
+        # Runs in a worker thread, so open a dedicated session (sessions are not thread-safe);
+        # it is only read from, generated sentences are collected instead of saved
+        generated = []
+        with Session(self.bind) as word_session:
+            word_data = get_phrase_with_example_and_translation(
+                phrase=word_str,
+                language=language,
+                target_language=TARGET_LANGUAGE,
+                proficiency=PROFICIENCY,
+                session=word_session,
+                use_gpt_translation=self.use_gpt_translation,
+                generated_sentences=generated
+            )
+        
+        with self._lock:
+            self._generated_sentences.extend((sentence, language) for sentence in generated)
+        
+        if not is_complete_result(word_data):
+            logger.warning(f"    Not caching incomplete result for '{word_str}'")
+            return word_data
+        
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translation_cache (key, payload) VALUES (?, ?)",
+                (key, json_serializer(word_data))
+            )
+            self._conn.commit()
+        return word_data
+    
+    def save_generated_sentences(self, session: Session) -> None:
+        """Save and index the sentences generated so far; call from the main thread only."""
+        with self._lock:
+            pending, self._generated_sentences = self._generated_sentences, []
+        for sentence, language in pending:
+            save_generated_sentence(session, sentence, language, PROFICIENCY)
+    
+    def close(self):
+        self._conn.close()
+
+
+def process_word(word_str: str, language: str, cache: TranslationCache) -> Dict[str, Any]:
+    """
+    Build the new-format word object for a single word.
+    
+    Returns:
+        Word dict in WordInList format; translation fields are None if processing failed
+    """
     try:
-        words = json.loads(words_json)
-        if not words:
-            return False
-        # Check if first item is a string (old format) vs dict (new format)
-        return isinstance(words[0], str)
-    except (json.JSONDecodeError, IndexError, TypeError):
-        return False
+        logger.info(f"  Processing word '{word_str}'")
+        
+        # Get word with translation and example
+        word_data = cache.get(word_str, language)
+        
+        logger.info(f"    ✓ {word_str} -> {word_data['word_translation']}")
+        
+        # Create word object in new format
+        return {
+            "word": word_data["word"],
+            "word_translation": word_data["word_translation"],
+            "example_phrase": word_data["example_phrase"],
+            "example_phrase_translation": word_data["example_phrase_translation"]
+        }
+        
+    except Exception as e:
+        logger.error(f"    ✗ Failed to process word '{word_str}': {str(e)}")
+        # Add a basic word object as fallback
+        return {
+            "word": word_str,
+            "word_translation": None,
+            "example_phrase": None,
+            "example_phrase_translation": None
+        }
 
 
 def migrate_wordlist_data(
@@ -49,95 +190,61 @@ def migrate_wordlist_data(
     wordlist_name: str,
     words_json: str, 
     language: str,
-    session: Session, 
-    use_gpt_translation: bool = False,
-    dry_run: bool = False
-) -> bool:
+    session: Session,
+    cache: TranslationCache,
+    workers: int = DEFAULT_WORKERS
+) -> Optional[str]:
     """
-    Migrate a single wordlist's words from old format to new format.
+    Convert a single wordlist's words from old format to new format.
     
     Args:
         wordlist_id: ID of the wordlist
         wordlist_name: Name of the wordlist  
         words_json: JSON string of words
         language: Language of the wordlist
-        session: Database session
-        use_gpt_translation: Whether to use GPT for translation
-        dry_run: If True, don't save changes to database
+        session: Session used to save the example sentences generated for the words
+        cache: Translation memory used to look up each word
+        workers: Number of words processed concurrently
+        
+    Wordlist rows are not written here; main() batches the UPDATEs of a page.
         
     Returns:
-        True if migration was needed and successful, False otherwise
+        New words JSON if migration was needed, None otherwise
     """
     
     try:
         words = json.loads(words_json)
     except json.JSONDecodeError:
         logger.error(f"Invalid JSON in wordlist '{wordlist_name}' (ID: {wordlist_id})")
-        return False
+        return None
     
-    if not is_old_format(words_json):
+    if not isinstance(words, list) or not is_old_format(words):
         logger.info(f"Wordlist '{wordlist_name}' (ID: {wordlist_id}) is already in new format")
-        return False
+        return None
     
     logger.info(f"Migrating wordlist '{wordlist_name}' (ID: {wordlist_id}) with {len(words)} words")
     
-    new_words = []
+    # Words are independent network-bound lookups, so fetch them concurrently;
+    # executor.map keeps the results in the original word order
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        new_words = list(executor.map(
+            lambda word_str: process_word(word_str, language, cache),
+            words
+        ))
+    # Database and sentence index writes stay on this thread, after the pool is done
+    cache.save_generated_sentences(session)
     
-    for i, word_str in enumerate(words):
-        try:
-            logger.info(f"  Processing word {i+1}/{len(words)}: '{word_str}'")
-            
-            # Get word with translation and example
-            word_data = get_phrase_with_example_and_translation(
-                phrase=word_str,
-                language=language,
-                target_language="en",
-                proficiency="intermediate",
-                session=session,
-                use_gpt_translation=use_gpt_translation
-            )
-            
-            # Create word object in new format
-            word_dict = {
-                "word": word_data["word"],
-                "word_translation": word_data["word_translation"],
-                "example_phrase": word_data["example_phrase"],
-                "example_phrase_translation": word_data["example_phrase_translation"]
-            }
-            
-            new_words.append(word_dict)
-            
-            logger.info(f"    ✓ {word_str} -> {word_data['word_translation']}")
-            
-        except Exception as e:
-            logger.error(f"    ✗ Failed to process word '{word_str}': {str(e)}")
-            # Add a basic word object as fallback
-            new_words.append({
-                "word": word_str,
-                "word_translation": None,
-                "example_phrase": None,
-                "example_phrase_translation": None
-            })
-    
-    if not dry_run:
-        # Update the wordlist with new format using raw SQL
-        new_words_json = json.dumps(new_words)
-        update_query = text("""
-            UPDATE wordlist 
-            SET words = :new_words 
-            WHERE id = :wordlist_id
-        """)
-        
-        session.execute(update_query, {
-            "new_words": new_words_json,
-            "wordlist_id": wordlist_id
-        })
-        session.commit()
-        logger.info(f"✓ Migrated wordlist '{wordlist_name}' successfully")
-    else:
-        logger.info(f"✓ Would migrate wordlist '{wordlist_name}' (dry run mode)")
-    
-    return True
+    # Compact UTF-8 output; stdlib json.dumps escapes accented text and adds spaces
+    return json_serializer(new_words)
+
+
+def configure_sqlite_for_bulk_writes(dbapi_connection, connection_record) -> None:
+    """Use WAL with relaxed fsync so per-page commits don't block on a full sync."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
 
 
 def main():
@@ -162,12 +269,30 @@ def main():
         type=int, 
         help="Only migrate specific wordlist by ID"
     )
+    parser.add_argument(
+        "--workers", 
+        type=int, 
+        default=DEFAULT_WORKERS,
+        help="Number of words to look up concurrently"
+    )
+    parser.add_argument(
+        "--cache-path", 
+        default=DEFAULT_CACHE_PATH,
+        help="SQLite file used as translation memory across runs"
+    )
     
     args = parser.parse_args()
     
     # Create database engine
     database_url = f"sqlite:///database.db"
-    engine = create_engine(database_url)
+    # Same orjson codec as the application engine for the JSON columns touched by lookups
+    engine = create_engine(
+        database_url,
+        json_serializer=json_serializer,
+        json_deserializer=json_deserializer,
+    )
+    # Pragmas are per connection, so apply them to every pooled connection
+    event.listen(engine, "connect", configure_sqlite_for_bulk_writes)
     
     logger.info("Starting wordlist migration...")
     if args.dry_run:
@@ -175,8 +300,10 @@ def main():
     
     migrated_count = 0
     total_count = 0
+    cache = TranslationCache(args.cache_path, engine, use_gpt_translation=args.use_gpt_translation)
     
-    with Session(engine) as session:
+    # Rows are read as raw tuples, so nothing needs reloading after each page commit
+    with Session(engine, expire_on_commit=False) as session:
         # Build query based on arguments
         where_clauses = []
         params = {}
@@ -191,38 +318,67 @@ def main():
             params["wordlist_id"] = args.wordlist_id
             logger.info(f"Filtering by wordlist ID: {args.wordlist_id}")
         
-        where_clause = ""
-        if where_clauses:
-            where_clause = "WHERE " + " AND ".join(where_clauses)
+        where_clauses.append("id > :last_id")
+        where_clause = "WHERE " + " AND ".join(where_clauses)
         
-        # Get wordlists using raw SQL to avoid Pydantic validation issues
+        # Get wordlists using raw SQL to avoid Pydantic validation issues.
+        # Rows are read in keyset-paginated pages so the whole table is never held in memory.
         query = text(f"""
             SELECT id, name, words, language 
             FROM wordlist 
             {where_clause}
+            ORDER BY id
+            LIMIT :page_size
         """)
         
-        result = session.execute(query, params)
-        wordlists = result.fetchall()
-        total_count = len(wordlists)
-        
-        logger.info(f"Found {total_count} wordlists to check")
-        
-        for row in wordlists:
-            wordlist_id, wordlist_name, words_json, language = row
-            try:
-                if migrate_wordlist_data(
-                    wordlist_id=wordlist_id,
-                    wordlist_name=wordlist_name,
-                    words_json=words_json,
-                    language=language,
-                    session=session,
-                    use_gpt_translation=args.use_gpt_translation,
-                    dry_run=args.dry_run
-                ):
-                    migrated_count += 1
-            except Exception as e:
-                logger.error(f"Failed to migrate wordlist '{wordlist_name}' (ID: {wordlist_id}): {str(e)}")
+        update_query = text("""
+            UPDATE wordlist 
+            SET words = :new_words 
+            WHERE id = :wordlist_id
+        """)
+        
+        last_id = 0
+        while True:
+            result = session.execute(query, {**params, "last_id": last_id, "page_size": PAGE_SIZE})
+            wordlists = result.fetchall()
+            if not wordlists:
+                break
+            total_count += len(wordlists)
+            logger.info(f"Checking page of {len(wordlists)} wordlists after ID {last_id}")
+            
+            updates = []
+            for row in wordlists:
+                wordlist_id, wordlist_name, words_json, language = row
+                try:
+                    new_words_json = migrate_wordlist_data(
+                        wordlist_id=wordlist_id,
+                        wordlist_name=wordlist_name,
+                        words_json=words_json,
+                        language=language,
+                        session=session,
+                        cache=cache,
+                        workers=args.workers
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to migrate wordlist '{wordlist_name}' (ID: {wordlist_id}): {str(e)}")
+                    continue
+                if new_words_json is None:
+                    continue
+                
+                migrated_count += 1
+                if args.dry_run:
+                    logger.info(f"✓ Would migrate wordlist '{wordlist_name}' (dry run mode)")
+                else:
+                    updates.append({"new_words": new_words_json, "wordlist_id": wordlist_id})
+            
+            # One executemany UPDATE and one transaction per page
+            if updates:
+                session.execute(update_query, updates)
+                session.commit()
+                logger.info(f"✓ Migrated {len(updates)} wordlists in page after ID {last_id}")
+            last_id = wordlists[-1][0]
+    
+    cache.close()
     
     logger.info(f"\n📊 Migration Summary:")
     logger.info(f"   Total wordlists checked: {total_count}")
@@ -1,13 +1,16 @@
 import logging
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 import json
-import re
-from typing import Dict, List, Optional, Any, Tuple
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
 from sqlmodel import Session, select
+from sqlalchemy.orm import defer
 from fastapi import HTTPException
 
-from backend.models.dict_spanish import SpanishDictionary
+from backend.models.dict_spanish import SpanishDictionary, intern_str
 
 from backend.models.dict_spanish import (
     SpanishWordEntry, SpanishWordDefinition, VerbConjugations,
@@ -17,6 +20,20 @@ from backend.models.dict_spanish import (
 from backend.models.shared import Definition, Example, AudioInfo
 
 
+# Upper bound on concurrent SpanishDict requests per lookup
+SPANISHDICT_MAX_WORKERS = 8
+# Keep-alive connections kept by the shared client; covers several concurrent lookups
+SPANISHDICT_POOL_SIZE = 32
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# Assignment target of the page's embedded component JSON
+SD_COMPONENT_DATA_MARKER = b"window.SD_COMPONENT_DATA"
+_json_decoder = json.JSONDecoder()
+
+
 class SpanishDictClient:
     """
     A client for parsing and extracting information from SpanishDict.com
@@ -32,6 +49,9 @@ class SpanishDictClient:
     def __init__(self):
         self.session = requests.Session()
         self.session.headers.update(self.HEADERS)
+        # All requests go to one host; without a larger pool, connections opened by
+        # concurrent lookups beyond the default 10 are discarded after use
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=SPANISHDICT_POOL_SIZE))
 
     def get_word_data(self, word: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         """
@@ -49,10 +69,8 @@ class SpanishDictClient:
         response = self.session.get(url)
         response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-
         # Extract initial state data if available
-        component_data = self._extract_initial_state(soup)
+        component_data = self._extract_initial_state(response.content)
 
         if not component_data:
             return {}, {}
@@ -69,20 +87,27 @@ class SpanishDictClient:
 
         return word_defs, audio_info
 
-    def _extract_initial_state(self, soup: BeautifulSoup) -> Dict[str, Any]:
+    def _extract_initial_state(self, content: bytes) -> Dict[str, Any]:
         """
         Extract data from the initial state JSON if available
         """
+        # The JSON is located directly in the response bytes; no HTML tree is built
+        marker = content.find(SD_COMPONENT_DATA_MARKER)
+        start = content.find(b'{', marker) if marker != -1 else -1
+        if start == -1:
+            return {}
+        end = content.find(b'</script>', start)
+        script = content[start:end] if end != -1 else content[start:]
+        try:
+            # Usual page layout: the object runs to the last brace of its script
+            return orjson.loads(script[:script.rfind(b'}') + 1])
+        except orjson.JSONDecodeError:
+            pass
         try:
-            # Look for the script that contains the initial state data
-            for script in soup.find_all('script'):
-                if script.string and 'window.SD_COMPONENT_DATA' in script.string:
-                    # Extract the JSON data
-                    json_str = re.search(r'window\.SD_COMPONENT_DATA\s*=\s*({.*});', script.string, re.DOTALL)
-                    if json_str:
-                        return json.loads(json_str.group(1))
-        except (json.JSONDecodeError, AttributeError) as e:
-            print(f"Error extracting initial state: {e}")
+            # More code follows the object; the decoder stops where it is balanced
+            return _json_decoder.raw_decode(script.decode())[0]
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            logger.warning("Error extracting initial state", exc_info=True)
 
         return {}
 
@@ -94,10 +119,8 @@ class SpanishDictClient:
         response = self.session.get(url)
         response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-
         # Try to extract from initial state first
-        data = self._extract_initial_state(soup)
+        data = self._extract_initial_state(response.content)
 
         # Check if verb data is available in the extracted data
         if not (data and "verb" in data and data["verb"] and "paradigms" in data["verb"]):
@@ -130,6 +153,10 @@ class SpanishDictClient:
         return result
 
 
+# Shared across requests so the HTTPS connection to SpanishDict is kept alive
+_spanishdict_client = SpanishDictClient()
+
+
 def parse_audio_info(raw_audio_data: Dict[str, Any]) -> Tuple[Optional[AudioInfo], Optional[AudioInfo]]:
     """Parse raw audio data into AudioInfo models."""
     spanish_audio = None
@@ -160,66 +187,47 @@ def parse_audio_info(raw_audio_data: Dict[str, Any]) -> Tuple[Optional[AudioInfo
 
 def parse_examples(raw_examples: List[Dict[str, str]]) -> List[Example]:
     """Parse raw examples into Example models."""
-    examples = []
-
-    for example in raw_examples:
-        if 'textEs' in example and 'textEn' in example:
-            examples.append(Example(
-                source_text=example['textEs'],
-                target_text=example['textEn']
-            ))
-
-    return examples
+    return [
+        Example(source_text=example['textEs'], target_text=example['textEn'])
+        for example in raw_examples
+        if 'textEs' in example and 'textEn' in example
+    ]
 
 
 def parse_translations(raw_translations: List[Dict[str, Any]]) -> List[Translation]:
     """Parse raw translations into Translation models."""
-    translations = []
-
-    for trans in raw_translations:
-        # Parse examples
-        examples = parse_examples(trans.get('examples', []))
-
-        translations.append(Translation(
+    return [
+        Translation(
             translation=trans.get('translation', ''),
-            examples=examples,
+            examples=parse_examples(trans.get('examples') or ()),
             context=trans.get('contextEn', '')
-        ))
-
-    return translations
+        )
+        for trans in raw_translations
+    ]
 
 
 def parse_senses(raw_senses: List[Dict[str, Any]]) -> List[Sense]:
     """Parse raw senses into Sense models."""
-    senses = []
-
-    for sense in raw_senses:
-        translations = parse_translations(sense.get('translations', []))
-
-        senses.append(Sense(
+    return [
+        Sense(
             context_en=sense.get('contextEn', ''),
             context_es=sense.get('contextEs', ''),
             gender=sense.get('gender'),
-            translations=translations
-        ))
-
-    return senses
+            translations=parse_translations(sense.get('translations') or ())
+        )
+        for sense in raw_senses
+    ]
 
 
 def parse_pos_groups(raw_pos_groups: List[Dict[str, Any]]) -> List[PosGroup]:
     """Parse raw POS groups into PosGroup models."""
-    pos_groups = []
-
-    for group in raw_pos_groups:
-        pos = group.get('pos', {}).get('nameEn', '')
-        senses = parse_senses(group.get('senses', []))
-
-        pos_groups.append(PosGroup(
-            pos=pos,
-            senses=senses
-        ))
-
-    return pos_groups
+    return [
+        PosGroup(
+            pos=group.get('pos', {}).get('nameEn', ''),
+            senses=parse_senses(group.get('senses') or ())
+        )
+        for group in raw_pos_groups
+    ]
 
 
 def parse_spanish_word_data(raw_data: List[Dict[str, Any]]) -> List[SpanishWordEntry]:
@@ -237,32 +245,57 @@ def parse_spanish_word_data(raw_data: List[Dict[str, Any]]) -> List[SpanishWordE
                 word=subheadword,
                 pos_groups=pos_groups
             ))
-        except Exception as e:
-            print(f"Error parsing word entry: {e}")
+        except Exception:
+            logger.warning("Error parsing word entry", exc_info=True)
 
     return entries
 
 
-def collect_verb_examples(word_data: List[Dict[str, Any]]) -> List[Example]:
-    """Collect examples of verb usage from word data."""
-    all_examples = []
+def dump_spanish_word_data(entries: List[SpanishWordEntry]) -> List[Dict[str, Any]]:
+    """
+    Serialize parsed entries for the cache, leaving out fields that hold their defaults.
 
-    for entry in word_data:
-        for pos_group in entry.get('posGroups', []):
-            pos_name = pos_group.get('pos', {}).get('nameEn', '').lower()
+    Empty example lists, contexts and the reserved synonym/antonym fields make up a
+    large share of a dumped entry; SpanishWordEntry fills them back in on read.
+    """
+    return [entry.model_dump(exclude_defaults=True) for entry in entries]
 
-            if 'verb' in pos_name:
-                # Collect examples
-                for sense in pos_group.get('senses', []):
-                    for translation_item in sense.get('translations', []):
-                        for example in translation_item.get('examples', []):
-                            if 'textEs' in example and 'textEn' in example:
-                                all_examples.append(Example(
-                                    source_text=example['textEs'],
-                                    target_text=example['textEn']
-                                ))
 
-    return all_examples
+def load_cached_spanish_word_data(cached: List[Dict[str, Any]]) -> List[SpanishWordEntry]:
+    """
+    Rebuild entries from the cache without re-validating them.
+
+    Cached data was produced by dump_spanish_word_data from validated models, so each
+    level is assembled with model_construct, which also fills in the omitted defaults.
+    """
+    return [
+        SpanishWordEntry.model_construct(
+            word=entry['word'],
+            pos_groups=[
+                PosGroup.model_construct(
+                    pos=intern_str(group['pos']),
+                    senses=[
+                        Sense.model_construct(**{
+                            **sense,
+                            'translations': [
+                                Translation.model_construct(**{
+                                    **translation,
+                                    'examples': [
+                                        Example.model_construct(**example)
+                                        for example in translation.get('examples', [])
+                                    ],
+                                })
+                                for translation in sense.get('translations', [])
+                            ],
+                        })
+                        for sense in group.get('senses', [])
+                    ],
+                )
+                for group in entry.get('pos_groups', [])
+            ],
+        )
+        for entry in cached
+    ]
 
 
 def parse_conjugation_data(raw_data: Dict[str, Any]) -> Optional[VerbConjugations]:
@@ -312,19 +345,38 @@ def parse_conjugation_data(raw_data: Dict[str, Any]) -> Optional[VerbConjugation
             tenses=tenses,
             examples=[]
         )
-    except Exception as e:
-        print(f"Error parsing conjugation data: {e}")
+    except Exception:
+        logger.warning("Error parsing conjugation data", exc_info=True)
         return None
 
 
+@lru_cache(maxsize=None)
+def is_verb_pos(pos: str) -> bool:
+    """Whether a POS name denotes a verb; POS names form a small closed set, so each is checked once."""
+    return 'verb' in pos.lower()
+
+
 def is_verb(entries: List[SpanishWordEntry]) -> bool:
     """Check if the word is a verb based on its part of speech."""
-    for entry in entries:
-        for pos_group in entry.pos_groups:
-            pos_name = pos_group.pos.lower()
-            if 'verb' in pos_name:
-                return True
-    return False
+    return any(is_verb_pos(pos_group.pos) for entry in entries for pos_group in entry.pos_groups)
+
+
+def _fetch_concurrently(calls: List[Tuple[Callable[[str], T], str]]) -> List[T]:
+    """Run blocking SpanishDict fetches in parallel, returning results in call order."""
+    if len(calls) <= 1:
+        return [fetch(word) for fetch, word in calls]
+    with ThreadPoolExecutor(max_workers=min(SPANISHDICT_MAX_WORKERS, len(calls))) as executor:
+        futures = [executor.submit(fetch, word) for fetch, word in calls]
+        return [future.result() for future in futures]
+
+
+def _prefetch_conjugations(word: str) -> Optional[Dict[str, Any]]:
+    """Fetch conjugations of a word not yet known to be a verb; failures are left to the regular fetch."""
+    try:
+        return _spanishdict_client.get_conjugations(word)
+    except Exception:
+        logger.debug("Conjugation prefetch failed for %s", word, exc_info=True)
+        return None
 
 
 def get_spanish_word_definition(words: list[str], include_conjugations: bool = False, session: Session = None, override_cache: bool = False, read_only: bool = False) -> list[Definition]:
@@ -344,40 +396,45 @@ def get_spanish_word_definition(words: list[str], include_conjugations: bool = F
     words = [_.lower() for _ in words]
     # Check cache if session is provided
     if not override_cache and session:
-        dictionary_from_db = session.exec(
-            select(SpanishDictionary).where(SpanishDictionary.word.in_(words))
-        ).fetchall()
-        dictionary_entries_map = {
-            item.word: item for item in dictionary_from_db
-        }
+        query = select(SpanishDictionary).where(SpanishDictionary.word.in_(words))
+        if not include_conjugations:
+            # Conjugation tables are the largest payload; skip loading them unless requested
+            query = query.options(defer(SpanishDictionary.conjugation_data))
+        # Build the map while iterating the result instead of materializing a list first
+        dictionary_entries_map = {item.word: item for item in session.exec(query)}
     else:
         dictionary_entries_map = {}
+    logger.debug("map: %s", dictionary_entries_map)
 
-    result = []
-    logging.debug(f"map:{dictionary_entries_map}")
+    # Fetch every word missing from the cache concurrently; each lookup is a blocking HTTP round-trip
+    def needs_fetch(word: str) -> bool:
+        dictionary_entry = dictionary_entries_map.get(word)
+        return not dictionary_entry.word_data if dictionary_entry else not read_only
+
+    client = _spanishdict_client
+    missing = [word for word in dict.fromkeys(words) if needs_fetch(word)]
+    calls = [(client.get_word_data, word) for word in missing]
+    if include_conjugations:
+        # Whether a missing word is a verb is only known from its word page, so its
+        # conjugation page is requested alongside it instead of after it
+        calls += [(_prefetch_conjugations, word) for word in missing]
+    results = _fetch_concurrently(calls)
+    fetched = dict(zip(missing, results))
+    prefetched_conjugations = {
+        word: data for word, data in zip(missing, results[len(missing):]) if data is not None
+    }
+
+    cache_updated = False
+    word_results = []
     for word in words:
         dictionary_entry = dictionary_entries_map.get(word)
-        logging.debug(f"word:{word}")
-        if dictionary_entry:
-            entries = [SpanishWordEntry(**entry) for entry in dictionary_entry.word_data]
+        logger.debug("word: %s", word)
+        if dictionary_entry and dictionary_entry.word_data:
+            entries = load_cached_spanish_word_data(dictionary_entry.word_data)
             audio_data = dictionary_entry.audio_data
-            conjugation_data = dictionary_entry.conjugation_data
-            logging.debug("found a word")
-        else:
-            entries = None
-            audio_data = None
-            conjugation_data = None
-            if read_only:
-                result.append(
-                    SpanishWordDefinition.init_empty(word=word)
-                )
-                logging.debug("not found a word, continue")
-                continue
-
-        # If not in cache or no session provided, fetch word data from API
-        if not entries:
-            client = SpanishDictClient()
-            word_data, audio_data = client.get_word_data(word)
+            logger.debug("found a word")
+        elif word in fetched:
+            word_data, audio_data = fetched[word]
 
             # Parse the data into our Pydantic models
             entries = parse_spanish_word_data(word_data)
@@ -386,37 +443,66 @@ def get_spanish_word_definition(words: list[str], include_conjugations: bool = F
             if session and entries:
                 if dictionary_entry:
                     # Update existing entry
-                    dictionary_entry.word_data = entries
+                    dictionary_entry.word_data = dump_spanish_word_data(entries)
                     dictionary_entry.audio_data = audio_data
                 else:
                     # Create new entry
                     dictionary_entry = SpanishDictionary(
                         word=word,
-                        word_data=[_.model_dump() for _ in entries],
+                        word_data=dump_spanish_word_data(entries),
                         audio_data=audio_data
                     )
-                session.add(dictionary_entry)
-                session.commit()
+                    dictionary_entries_map[word] = dictionary_entry
+                    session.add(dictionary_entry)
+                cache_updated = True
+        else:
+            logger.debug("not found a word, continue")
+            word_results.append((word, None, None, None, False))
+            continue
+        # Walk the entries for a verb POS once; both conjugation passes below reuse it
+        wants_conjugations = include_conjugations and bool(entries) and is_verb(entries)
+        word_results.append((word, dictionary_entry, entries, audio_data, wants_conjugations))
+
+    # Fetch the remaining conjugation tables of verbs concurrently as well
+    conjugations_to_fetch = list(dict.fromkeys(
+        word for word, dictionary_entry, _, _, wants_conjugations in word_results
+        if wants_conjugations
+        and not (dictionary_entry and dictionary_entry.conjugation_data)
+        and word not in prefetched_conjugations
+    ))
+    fetched_conjugations = {
+        **prefetched_conjugations,
+        **dict(zip(
+            conjugations_to_fetch,
+            _fetch_concurrently([(client.get_conjugations, word) for word in conjugations_to_fetch])
+        )),
+    }
+
+    result = []
+    for word, dictionary_entry, entries, audio_data, wants_conjugations in word_results:
+        if entries is None:
+            result.append(
+                SpanishWordDefinition.init_empty(word=word)
+            )
+            continue
 
         # Fetch conjugation data if this is a verb and conjugations are requested
         conjugations = None
-        if include_conjugations and is_verb(entries):
+        if wants_conjugations:
             # Check if we already have conjugation data in cache
             if dictionary_entry and dictionary_entry.conjugation_data:
                 conjugation_data = dictionary_entry.conjugation_data
-            # If no cache or not in cache, fetch from API
             else:
-                client = SpanishDictClient()
-                conjugation_data = client.get_conjugations(word)
+                conjugation_data = fetched_conjugations[word]
 
                 # Update cache with conjugation data
-                if session and conjugation_data:
+                # (the entry is already tracked by the session, loaded or added above)
+                if session and conjugation_data and dictionary_entry:
                     dictionary_entry.conjugation_data = conjugation_data
-                    session.add(dictionary_entry)
-                    session.commit()
+                    cache_updated = True
 
             # Parse conjugation data if available
-            if include_conjugations and conjugation_data:
+            if conjugation_data:
                 conjugations = parse_conjugation_data(conjugation_data)
                 
         # Parse audio data
@@ -432,4 +518,8 @@ def get_spanish_word_definition(words: list[str], include_conjugations: bool = F
         )
         result.append(spanish_def)
         # add as dictionary to match WordDefinitionResponse format
+
+    # Store all new and refreshed cache entries in one transaction
+    if cache_updated:
+        session.commit()
     return result
@@ -1,5 +1,11 @@
 import logging
+import threading
+import time
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 from sqlmodel import Session, select
 
 from backend.models.dict_english import Dictionary, EnglishDialect
@@ -12,107 +18,145 @@ from backend.models.dict_english import (
 from backend.models.shared import Definition
 
 
+# Upper bound on concurrent dictionary API requests per lookup
+DICTIONARY_API_MAX_WORKERS = 8
+# Keep-alive connections kept by the shared session; covers several concurrent lookups
+DICTIONARY_API_POOL_SIZE = 32
+# (connect, read) timeout in seconds; a stalled lookup would otherwise hold its worker forever
+DICTIONARY_API_TIMEOUT = (3.05, 10)
+# Words whose lookup failed transiently are not retried for this many seconds
+FAILED_LOOKUP_TTL = 600
+FAILED_LOOKUP_CACHE_SIZE = 10_000
+
+# word -> monotonic time until which the API is not asked again
+_failed_lookups: Dict[str, float] = {}
+_failed_lookups_lock = threading.Lock()
+
+
+class WordNotFound(Exception):
+    """The dictionary API has no entry for the word."""
+
+
+def _create_api_session() -> requests.Session:
+    """Session whose pooled keep-alive connections are shared by all lookups."""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=DICTIONARY_API_POOL_SIZE))
+    return session
+
+
 class DictionaryApiClient:
     """Client for the Free Dictionary API."""
     url = 'https://api.dictionaryapi.dev/api/v2/entries/en/{}'
+    session = _create_api_session()
 
     @staticmethod
     def define(word: str) -> list:
         """Get definition data for a word."""
-        response = requests.get(DictionaryApiClient.url.format(word))
+        response = DictionaryApiClient.session.get(
+            DictionaryApiClient.url.format(word), timeout=DICTIONARY_API_TIMEOUT
+        )
+        if response.status_code == 404:
+            raise WordNotFound(f"Error fetching definition for word: {word}")
         if response.status_code != 200:
             raise Exception(f"Error fetching definition for word: {word}")
-        return response.json()
+        # Decode the raw bytes directly; skips requests' text decoding and stdlib json
+        return orjson.loads(response.content)
 
 
 def parse_english_word_definition(api_data: list, word: str) -> EnglishWordDefinition:
     """
     Parse the API response (list) into an EnglishWordDefinition instance.
+
+    The models are built with model_construct and skip validation, so missing or null
+    API values are coerced to the field defaults here; the result is cached and must
+    validate when read back.
     """
     if not api_data:
-        return EnglishWordDefinition(
-            word=word,
-            entries=[],
-            audio=None,
-            dialect=EnglishDialect.us
-        )
+        return EnglishWordDefinition.init_empty(word=word)
 
     entry = api_data[0]
 
-    # Pick the first valid audio link and determine dialect
-    audio_url = None
-    dialect = EnglishDialect.us
-    audio_text = word
-
-    for phon in entry.get("phonetics", []):
-        audio = phon.get("audio")
-        if audio:
-            audio_url = audio
-            if "uk" in audio:
-                dialect = EnglishDialect.uk
-            else:
-                dialect = EnglishDialect.us
-            break
-
-    # Create audio info if we have a URL
-    audio_info = AudioInfo(
-        text=audio_text,
+    # Pick the first valid audio link; its URL tells the dialect
+    audio_url = next((phon["audio"] for phon in entry.get("phonetics") or [] if phon.get("audio")), None)
+    dialect = EnglishDialect.uk if audio_url and "uk" in audio_url else EnglishDialect.us
+
+    audio_info = AudioInfo.model_construct(
+        text=word,
         audio_url=audio_url,
         lang="en"
     ) if audio_url else None
 
-    # Process part-of-speech groups
-    pos_groups = []
-    for meaning in entry.get("meanings", []):
-        part_of_speech = meaning.get("partOfSpeech", "")
-
-        # Process senses (definitions)
-        senses = []
-        for d in meaning.get("definitions", []):
-            examples = []
-            if d.get("example"):
-                # Create an example with the same text in both fields
-                # since English API doesn't provide translations
-                examples.append(Example(
-                    source_text=d.get("example", ""),
-                    target_text=d.get("example", "")
-                ))
-
-            # Create a translation (definition in English terminology)
-            definition_translation = EnglishTranslation(
-                examples=examples,
-            )
-
-            # Create a sense with this translation
-            senses.append(EnglishSense(
-                context_en=d.get("definition", ""),  # Context is definition in API
-                translations=[definition_translation],
-                synonyms=d.get("synonyms", []),
-                antonyms=d.get("antonyms", [])
-            ))
-
-        # Create a POS group with these senses
-        pos_groups.append(EnglishPosGroup(
-            pos=part_of_speech,
-            senses=senses
-        ))
-
-    # Create a single entry
-    entries = [
-        EnglishWordEntry(
-            word=word,
-            pos_groups=pos_groups
+    # One POS group per meaning; each API definition becomes a sense whose context is the
+    # definition text. The API gives no translations, so an example repeats its text on both sides
+    pos_groups = [
+        EnglishPosGroup.model_construct(
+            pos=meaning.get("partOfSpeech") or "",
+            senses=[
+                EnglishSense.model_construct(
+                    context_en=d.get("definition") or "",
+                    translations=[EnglishTranslation.model_construct(examples=[
+                        Example.model_construct(source_text=d["example"], target_text=d["example"])
+                    ] if d.get("example") else [])],
+                    synonyms=d.get("synonyms") or [],
+                    antonyms=d.get("antonyms") or []
+                )
+                for d in meaning.get("definitions") or []
+            ]
         )
+        for meaning in entry.get("meanings") or []
     ]
 
-    return EnglishWordDefinition(
+    return EnglishWordDefinition.model_construct(
         word=word,
-        entries=entries,
+        entries=[EnglishWordEntry.model_construct(word=word, pos_groups=pos_groups)],
         audio=audio_info,
         dialect=dialect
     )
 
 
+def _lookup_failed_recently(word: str) -> bool:
+    """Whether the word's last API lookup failed within FAILED_LOOKUP_TTL."""
+    expires_at = _failed_lookups.get(word)
+    return expires_at is not None and expires_at > time.monotonic()
+
+
+def _remember_failed_lookup(word: str) -> None:
+    with _failed_lookups_lock:
+        _failed_lookups.pop(word, None)
+        _failed_lookups[word] = time.monotonic() + FAILED_LOOKUP_TTL
+        if len(_failed_lookups) > FAILED_LOOKUP_CACHE_SIZE:
+            # Dicts keep insertion order, so this drops the oldest failure
+            del _failed_lookups[next(iter(_failed_lookups))]
+
+
+def _define(word: str) -> Optional[EnglishWordDefinition]:
+    """
+    Look a word up in the dictionary API.
+
+    Unknown words yield an empty definition, which is cached like any other. Other
+    failures (network errors, server errors, malformed responses) yield None and are
+    only remembered in-process for FAILED_LOOKUP_TTL, so they are retried later
+    instead of being stored as empty for good.
+    """
+    try:
+        api_data = DictionaryApiClient.define(word)
+        return parse_english_word_definition(api_data, word)
+    except WordNotFound:
+        return EnglishWordDefinition.init_empty(word=word)
+    except Exception:
+        logging.warning("Dictionary API lookup failed for %s", word, exc_info=True)
+        _remember_failed_lookup(word)
+        return None
+
+
+def _define_concurrently(words: List[str]) -> Dict[str, Optional[EnglishWordDefinition]]:
+    """Run the blocking dictionary API lookups of several words in parallel, keyed by word."""
+    if len(words) <= 1:
+        return {word: _define(word) for word in words}
+    with ThreadPoolExecutor(max_workers=min(DICTIONARY_API_MAX_WORKERS, len(words))) as executor:
+        return dict(zip(words, executor.map(_define, words)))
+
+
 def get_english_word_definition(words: list[str], session: Session, read_only: bool = False) -> list[Definition]:
     """
     Get a word definition from cache or the dictionary API.
@@ -120,41 +164,47 @@ def get_english_word_definition(words: list[str], session: Session, read_only: b
     """
     # Check cache if session is provided
     if session:
-        dictionary_from_db = session.exec(
-            select(Dictionary).where(Dictionary.word.in_(words))
-        ).fetchall()
+        # Cached entries are only read, so fetch the two columns instead of hydrating models
         dictionary_entries_map = {
-            item.word: item for item in dictionary_from_db
+            item.word: item for item in session.exec(
+                select(Dictionary.word, Dictionary.word_meta).where(Dictionary.word.in_(words))
+            )
         }
     else:
         dictionary_entries_map = {}
 
+    # Every API lookup is a blocking HTTP round-trip, so cache misses are fetched concurrently
+    missing = [] if read_only else [
+        word for word in dict.fromkeys(words)
+        if word not in dictionary_entries_map and not _lookup_failed_recently(word)
+    ]
+    fetched = _define_concurrently(missing)
+
     result = []
+    new_entries = {}
     for word in words:
         dictionary_entry = dictionary_entries_map.get(word)
 
         if dictionary_entry is None:
-            if read_only:
+            english_def = fetched.get(word)
+            if english_def is None:
+                # Read-only lookup, or the API failed recently: answer empty without caching
                 result.append(EnglishWordDefinition.init_empty(
                     word=word,
                 ))
                 continue
-            try:
-                api_data = DictionaryApiClient.define(word)
-                english_def = parse_english_word_definition(api_data, word)
-            except Exception as e:
-                english_def = EnglishWordDefinition.init_empty(
-                    word=word,
-                )
 
-            # Store as dictionary for flexibility
-            dictionary_entry = Dictionary(word=word, word_meta=english_def.model_dump())
-            session.add(dictionary_entry)
-            session.commit()
-            session.refresh(dictionary_entry)
+            # Store as dictionary for flexibility; repeated words share one entry
+            if word not in new_entries:
+                new_entries[word] = Dictionary(word=word, word_meta=english_def.model_dump())
 
             result.append(english_def)
         else:
             # Return the stored dictionary directly
             result.append(EnglishWordDefinition.model_validate(dictionary_entry.word_meta))
+
+    # Persist all fetched words in one transaction instead of a commit per word
+    if new_entries:
+        session.add_all(new_entries.values())
+        session.commit()
     return result
@@ -0,0 +1,111 @@
+"""In-database updates of the JSON note history."""
+
+from typing import List
+from sqlmodel import Session, text
+
+from backend.database import json_serializer
+
+
+# Position of the block with a given id in history['content'], evaluated against the row being updated
+_PG_BLOCK_INDEX = (
+    "(SELECT block.idx - 1 FROM jsonb_array_elements(history::jsonb -> 'content') "
+    "WITH ORDINALITY AS block(value, idx) "
+    "WHERE block.value @> CAST(:block_match AS jsonb) LIMIT 1)"
+)
+_SQLITE_BLOCK_PATH = (
+    "(SELECT fullkey FROM json_each(note.history, '$.content') "
+    "WHERE json_extract(value, '$.id') = :block_id LIMIT 1)"
+)
+
+
+def append_note_blocks(session: Session, note_id: int, blocks: List[dict]) -> None:
+    """
+    Append blocks to a note's history inside the database.
+
+    Only the new blocks are sent; the existing history is extended in place
+    instead of being re-serialized and rewritten on every turn.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        query = text(
+            "UPDATE note SET history = jsonb_set("
+            "COALESCE(history::jsonb, '{}'::jsonb), '{content}', "
+            "COALESCE(history::jsonb -> 'content', '[]'::jsonb) || CAST(:blocks AS jsonb)"
+            ")::json WHERE id = :note_id"
+        )
+        params = {"blocks": json_serializer(blocks)}
+    else:
+        # SQLite: one '$[#]' (end of array) insertion per block
+        inserts = ", ".join(f"'$[#]', json(:block_{i})" for i in range(len(blocks)))
+        query = text(
+            "UPDATE note SET history = json_set("
+            "COALESCE(history, '{}'), '$.content', "
+            f"json_insert(COALESCE(json_extract(history, '$.content'), '[]'), {inserts})"
+            ") WHERE id = :note_id"
+        )
+        params = {f"block_{i}": json_serializer(block) for i, block in enumerate(blocks)}
+    session.exec(query, params={**params, "note_id": note_id})
+
+
+def set_history_summary(session: Session, note_id: int, summary: dict) -> None:
+    """Store the rolling history summary without rewriting the note blocks."""
+    if session.get_bind().dialect.name == "postgresql":
+        query = text(
+            "UPDATE note SET history = jsonb_set("
+            "COALESCE(history::jsonb, '{}'::jsonb), '{summary}', CAST(:summary AS jsonb)"
+            ")::json WHERE id = :note_id"
+        )
+    else:
+        query = text(
+            "UPDATE note SET history = json_set("
+            "COALESCE(history, '{}'), '$.summary', json(:summary)"
+            ") WHERE id = :note_id"
+        )
+    session.exec(query, params={"summary": json_serializer(summary), "note_id": note_id})
+
+
+def update_note_block_fields(session: Session, note_id: int, block_id: int, fields: dict) -> bool:
+    """
+    Merge fields into one note block inside the database.
+
+    Returns False when the note has no block with that id.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        query = text(
+            "UPDATE note SET history = jsonb_set("
+            f"history::jsonb, ARRAY['content', {_PG_BLOCK_INDEX}::text], "
+            f"(history::jsonb -> 'content' -> {_PG_BLOCK_INDEX}::int) || CAST(:fields AS jsonb)"
+            f")::json WHERE id = :note_id AND {_PG_BLOCK_INDEX} IS NOT NULL"
+        )
+    else:
+        query = text(
+            "UPDATE note SET history = json_set("
+            f"history, {_SQLITE_BLOCK_PATH}, "
+            f"json_patch(json_extract(history, {_SQLITE_BLOCK_PATH}), json(:fields))"
+            f") WHERE id = :note_id AND {_SQLITE_BLOCK_PATH} IS NOT NULL"
+        )
+    result = session.exec(query, params={
+        "fields": json_serializer(fields),
+        "note_id": note_id,
+        "block_id": block_id,
+        "block_match": json_serializer({"id": block_id}),
+    })
+    return result.rowcount > 0
+
+
+def remove_note_block(session: Session, note_id: int, block_id: int) -> None:
+    """Remove one note block from the history inside the database."""
+    if session.get_bind().dialect.name == "postgresql":
+        query = text(
+            f"UPDATE note SET history = (history::jsonb #- ARRAY['content', {_PG_BLOCK_INDEX}::text])::json "
+            f"WHERE id = :note_id AND {_PG_BLOCK_INDEX} IS NOT NULL"
+        )
+    else:
+        query = text(
+            f"UPDATE note SET history = json_remove(history, {_SQLITE_BLOCK_PATH}) "
+            f"WHERE id = :note_id AND {_SQLITE_BLOCK_PATH} IS NOT NULL"
+        )
+    session.exec(query, params={
+        "note_id": note_id,
+        "block_id": block_id,
+        "block_match": json_serializer({"id": block_id}),
+    })
@@ -1,14 +1,20 @@
 import os
 import uuid
-from datetime import datetime
+import hashlib
+import threading
+import orjson
+from datetime import timedelta
 from pathlib import Path
-from sqlmodel import Session, select, update, delete
+from urllib.parse import quote
+from sqlmodel import Session, select, delete
 from fastapi import HTTPException, UploadFile
-from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
 from openai import OpenAI
-from typing import List
+from typing import Iterator, List, Optional
 
 from backend.models.note import (
+    IMAGE_REF_RE,
     Note,
     NoteListResponse,
     NoteBlock,
@@ -16,11 +22,31 @@ from backend.models.note import (
     NoteBlockUpdate,
     NoteImage,
     NoteImageResponse,
+    NoteResponseCache,
     QuestionCreate,
+    utc_now,
 )
-from backend.constants import SYSTEM_PROMPT
+from backend.constants import SYSTEM_MESSAGE, SUMMARY_PROMPT
+from backend.database import json_serializer
+from backend.services.note_history import (
+    append_note_blocks, remove_note_block, set_history_summary, update_note_block_fields
+)
+from backend.services.question.image_processor import encoded_image
 from backend.services.question_service import QuestionService
 
+# Most recent note blocks sent verbatim to the model; older ones are summarized
+HISTORY_WINDOW = 20
+# Summarize once this many blocks have left the window, not on every turn
+SUMMARY_BATCH = 20
+# Cap on the estimated tokens of verbatim history, for windows of long blocks
+HISTORY_TOKEN_BUDGET = 12000
+# Rough size of a token in characters, good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+NOTE_MODEL = "gpt-4o-mini"  # This model supports images
+# Replies to an identical prompt (e.g. retries) are reused for this long
+RESPONSE_CACHE_TTL = timedelta(days=1)
+
 # Initialize OpenAI client
 client = OpenAI(
     api_key=os.environ.get("OPENAI_API_KEY"),
@@ -30,19 +56,18 @@ def create_note(session: Session, note: Note) -> Note:
     """Create a new note session."""
     session.add(note)
     session.commit()
-    session.refresh(note)
     return note
 
 def get_note_list(session: Session, offset: int = 0, limit: int = 100) -> list[NoteListResponse]:
     """Get a list of note sessions."""
-    notes = session.exec(select(Note).order_by(Note.id.desc()).limit(limit).offset(offset)).all()
-    notes = [NoteListResponse(id=note.id, name=note.name) for note in notes]
-    return notes
+    # Only id and name are needed; skip loading the history column
+    rows = session.exec(
+        select(Note.id, Note.name).order_by(Note.id.desc()).limit(limit).offset(offset)
+    ).all()
+    return [NoteListResponse(id=note_id, name=name) for note_id, name in rows]
 
 def get_note(session: Session, id: int) -> Note:
     """Get a specific note session by ID."""
-    import re
-    
     note = session.get(Note, id)
     if not note:
         raise HTTPException(status_code=404, detail="Note not found")
@@ -56,8 +81,7 @@ def get_note(session: Session, id: int) -> Note:
         if 'image_ids' not in block_dict or not block_dict['image_ids']:
             # Scan content for @image:X references
             block_content = block_dict.get('content', '')
-            print(block_content)
-            image_refs = re.findall(r'@image:(\d+)', block_content)
+            image_refs = IMAGE_REF_RE.findall(block_content)
             if image_refs:
                 block_dict['image_ids'] = [int(img_id) for img_id in image_refs]
     
@@ -70,6 +94,11 @@ def delete_note(session: Session, id: int) -> dict:
     session.commit()
     return {'status': 'ok'}
 
+def _assert_note_exists(session: Session, note_id: int) -> None:
+    """Raise 404 unless the note exists, without loading its history."""
+    if session.exec(select(Note.id).where(Note.id == note_id)).first() is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+
 def _ensure_history_content(history: dict) -> List[dict]:
     """Return note history content ensuring list structure."""
     if not(content:= history.get('content')):
@@ -79,11 +108,25 @@ def _ensure_history_content(history: dict) -> List[dict]:
         raise HTTPException(status_code=400, detail="Note history is corrupted")
     return content
 
-def send_note_block(session: Session, id: int, note_block: NoteBlockCreate) -> dict:
-    """Send a note block to a note session and get response."""
-    import re
-    import base64
-    
+def _summarize_history(summary: dict, blocks: List[dict]) -> dict:
+    """Fold blocks that left the history window into the rolling summary."""
+    transcript = "\n\n".join(f"{block.get('role')}: {block.get('content')}" for block in blocks)
+    if summary.get('text'):
+        transcript = f"Previous summary:\n{summary['text']}\n\n{transcript}"
+    response = client.chat.completions.create(
+        messages=[
+            {"role": "developer", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": transcript},
+        ],
+        model=NOTE_MODEL,
+    )
+    return {
+        'text': response.choices[0].message.content,
+        'last_block_id': blocks[-1].get('id', 0),
+    }
+
+def _add_user_note_block(session: Session, id: int, note_block: NoteBlockCreate) -> tuple[Note, dict, List[dict]]:
+    """Load the note and append the user's block to its in-memory history."""
     # Retrieve the note object
     note = session.get(Note, id)
     if not note:
@@ -93,157 +136,235 @@ def send_note_block(session: Session, id: int, note_block: NoteBlockCreate) -> d
     history = note.history or {}
     content = _ensure_history_content(history)
 
-    # Parse image references in the note block
-    processed_message = note_block.block
-    image_contents = []
-    
-    # Find all image references in format @image:id
-    image_refs = re.findall(r'@image:(\d+)', note_block.block)
-    
-    # Extract image IDs from content
-    extracted_image_ids = [int(img_id) for img_id in image_refs]
-    
-    if image_refs:
-        # Get referenced images
-        for img_id in image_refs:
-            try:
-                image = session.exec(
-                    select(NoteImage).where(NoteImage.id == int(img_id), NoteImage.note_id == id)
-                ).first()
-                
-                if image and os.path.exists(image.file_path):
-                    # Read and encode image
-                    with open(image.file_path, 'rb') as f:
-                        image_data = base64.b64encode(f.read()).decode()
-                    
-                    image_contents.append({
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:{image.mime_type};base64,{image_data}"
-                        }
-                    })
-                    
-                    # Replace reference with description in text
-                    processed_message = processed_message.replace(
-                        f"@image:{img_id}", 
-                        f"[Image: {image.original_filename}]"
-                    )
-            except (ValueError, TypeError):
-                continue
-
-    # Create note block content for note history and OpenAI
-    if image_contents:
-        # For OpenAI API with images
-        user_content = [{"type": "text", "text": processed_message}] + image_contents
-        # For note history - keep original note block with @image:id references for frontend
-        history_content = note_block.block
-    else:
-        user_content = processed_message
-        history_content = note_block.block
-
-    timestamp = datetime.utcnow()
+    # History keeps the original note block with @image:id references for frontend
+    timestamp = utc_now()
     user_note_block = NoteBlock(
         id=note.get_new_note_block_id(),
         role="user",
-        content=history_content,
+        content=note_block.block,
         created_at=timestamp,
         updated_at=timestamp,
         is_note=note_block.is_note,
-        image_ids=extracted_image_ids,
     )
 
     # Append the user's note block to history
     content.append(user_note_block.model_dump(mode="json"))
+    return note, history, [content[-1]]
 
-    # Update DB with user's note block
-    session.exec(
-        update(Note)
-        .where(Note.id == id)
-        .values(history=history)
-    )
-    session.commit()
+def _overflow_block_count(blocks: List[dict]) -> int:
+    """
+    Count the oldest blocks to fold into the summary, by window size or token budget.
 
-    assistant_response = ''
-    assistant_note_block = None
-    if not note_block.is_note:
-        # Prepare messages for OpenAI API
-        api_messages = [
-            {
-                "role": "developer",
-                "content": SYSTEM_PROMPT,
-            }
-        ]
-        
-        # Add note history (text only for previous note blocks)
-        for hist_msg in content[:-1]:  # Exclude the current note block
-            role = hist_msg.get("role")
-            msg_content = hist_msg.get("content")
-            api_messages.append({
-                "role": role,
-                "content": msg_content,
+    Blocks over HISTORY_TOKEN_BUDGET are folded in whole SUMMARY_BATCH chunks, like
+    window overflow, so the verbatim prefix stays put for the following turns.
+    """
+    overflow = len(blocks) - HISTORY_WINDOW if len(blocks) >= HISTORY_WINDOW + SUMMARY_BATCH else 0
+    remaining = HISTORY_TOKEN_BUDGET * CHARS_PER_TOKEN
+    start = len(blocks)
+    while start > 0:
+        remaining -= len(blocks[start - 1].get('content') or '')
+        if remaining < 0:
+            break
+        start -= 1
+    if start > overflow:
+        overflow = min(-(-start // SUMMARY_BATCH) * SUMMARY_BATCH, len(blocks))
+    return overflow
+
+def _build_api_messages(session: Session, id: int, history: dict, note_block: NoteBlockCreate) -> List[dict]:
+    """Build the OpenAI messages for the user's block, the last one in history."""
+    content = history['content']
+
+    # Find all image references in format @image:id
+    image_ids = {int(img_id) for img_id in IMAGE_REF_RE.findall(note_block.block)}
+    image_contents = []
+    processed_message = note_block.block
+
+    if image_ids:
+        # Get all referenced images in one query
+        images = session.exec(
+            select(NoteImage).where(NoteImage.id.in_(image_ids), NoteImage.note_id == id)
+        ).all()
+        images_by_id = {image.id: image for image in images}
+
+        def describe_image(match) -> str:
+            image = images_by_id.get(int(match.group(1)))
+            if not image:
+                return match.group(0)
+
+            # Read and encode image (cached until the file changes); skip missing files
+            try:
+                mtime_ns = os.stat(image.file_path).st_mtime_ns
+                image_url = encoded_image(image.id, mtime_ns, image.file_path, image.mime_type)
+            except OSError:
+                return match.group(0)
+
+            image_contents.append({
+                "type": "image_url",
+                "image_url": {
+                    "url": image_url
+                }
             })
-        
-        # Add current note block with potential images
+            # Replace reference with description in text
+            return f"[Image: {image.original_filename}]"
+
+        # One pass collects the images and rewrites every reference
+        processed_message = IMAGE_REF_RE.sub(describe_image, note_block.block)
+
+    # For OpenAI API with images
+    if image_contents:
+        user_content = [{"type": "text", "text": processed_message}] + image_contents
+    else:
+        user_content = processed_message
+
+    # Only blocks after the summarized prefix are sent verbatim
+    summary = history.get('summary') or {}
+    recent_blocks = [
+        block for block in content[:-1]  # Exclude the current note block
+        if block.get('id', 0) > summary.get('last_block_id', 0)
+    ]
+    if overflow := _overflow_block_count(recent_blocks):
+        summary = _summarize_history(summary, recent_blocks[:overflow])
+        recent_blocks = recent_blocks[overflow:]
+        set_history_summary(session, id, summary)
+
+    # Prepare messages for OpenAI API: stable system prefix, then append-only history
+    api_messages = [SYSTEM_MESSAGE]
+    if summary.get('text'):
         api_messages.append({
-            "role": "user",
-            "content": user_content
+            "role": "developer",
+            "content": f"Summary of the earlier note history:\n{summary['text']}",
         })
+    
+    # Add note history (text only for previous note blocks)
+    for hist_msg in recent_blocks:
+        role = hist_msg.get("role")
+        msg_content = hist_msg.get("content")
+        api_messages.append({
+            "role": role,
+            "content": msg_content,
+        })
+    
+    # Add current note block with potential images
+    api_messages.append({
+        "role": "user",
+        "content": user_content
+    })
+    return api_messages
+
+def _create_response_stream(id: int, api_messages: List[dict]):
+    """Start a streamed chat completion for the note prompt."""
+    # Call GPT with support for images
+    return client.chat.completions.create(
+        messages=api_messages,
+        model=NOTE_MODEL,
+        stream=True,
+        # Route turns of the same note to the same prompt cache
+        prompt_cache_key=f"note-{id}",
+    )
 
-        # Call GPT with support for images
-        response_stream = client.chat.completions.create(
-            messages=api_messages,
-            model="gpt-4o-mini",  # This model supports images
-            stream=True,
+def _response_deltas(response_stream) -> Iterator[str]:
+    """Yield the non-empty text deltas of a streamed completion."""
+    for chunk in response_stream:
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+
+def _response_cache_key(api_messages: List[dict]) -> str:
+    """Hash the exact prompt and model into a response cache key."""
+    payload = orjson.dumps(api_messages, option=orjson.OPT_SORT_KEYS) + NOTE_MODEL.encode()
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+def _get_cached_response(session: Session, key: str) -> Optional[str]:
+    """Return a cached reply for the prompt key if it hasn't expired."""
+    return session.exec(
+        select(NoteResponseCache.response).where(
+            NoteResponseCache.key == key,
+            NoteResponseCache.created_at >= utc_now() - RESPONSE_CACHE_TTL,
         )
+    ).first()
 
-        # Collect assistant's response
-        for chunk in response_stream:
-            delta = chunk.choices[0].delta.content
-            if delta:
-                assistant_response += delta
-
-        if assistant_response:
-            assistant_timestamp = datetime.utcnow()
-            assistant_note_block = NoteBlock(
-                id=note.get_new_note_block_id(),
-                role="assistant",
-                content=assistant_response,
-                created_at=assistant_timestamp,
-                updated_at=assistant_timestamp,
-            )
-
-            # Append the assistant's note block
-            content.append(assistant_note_block.model_dump(mode="json"))
-
-        # Update DB with assistant's response
-        session.exec(
-            update(Note)
-            .where(Note.id == id)
-            .values(history=history)
-        )
-        session.commit()
+def _cache_response(session: Session, key: str, response: str) -> None:
+    """
+    Store a reply for the prompt key; committed together with the note turn.
 
-    new_note_blocks = [user_note_block.model_dump(mode="json")]
-    if assistant_note_block is not None:
-        new_note_blocks.append(assistant_note_block.model_dump(mode="json"))
-    return {
-        'status': 'ok',
-        'new_note_blocks': new_note_blocks
-    }
+    Expired entries are deleted on the way, so the table only holds the last TTL's replies.
+    """
+    if response:
+        now = utc_now()
+        session.exec(delete(NoteResponseCache).where(NoteResponseCache.created_at < now - RESPONSE_CACHE_TTL))
+        session.merge(NoteResponseCache(key=key, response=response, created_at=now))
+
+def _add_assistant_note_block(note: Note, history: dict, new_note_blocks: List[dict], assistant_response: str) -> None:
+    """Append the assistant's reply, if any, to history and the new blocks."""
+    if not assistant_response:
+        return
+    assistant_timestamp = utc_now()
+    assistant_note_block = NoteBlock(
+        id=note.get_new_note_block_id(),
+        role="assistant",
+        content=assistant_response,
+        created_at=assistant_timestamp,
+        updated_at=assistant_timestamp,
+    )
+
+    # Append the assistant's note block
+    history['content'].append(assistant_note_block.model_dump(mode="json"))
+    new_note_blocks.append(history['content'][-1])
+
+def _save_note_blocks(session: Session, id: int, blocks: List[dict]) -> None:
+    """Persist blocks of the turn in a single transaction."""
+    if blocks:
+        append_note_blocks(session, id, blocks)
+    session.commit()
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format a server-sent event."""
+    return f"event: {event}\ndata: {json_serializer(data)}\n\n"
+
+def send_note_block(session: Session, id: int, note_block: NoteBlockCreate) -> Iterator[str]:
+    """
+    Send a note block to a note session and stream the response as server-sent events.
+
+    Deltas are sent as `delta` events while the model generates; the final `done`
+    event carries {'status', 'new_note_blocks'} once the blocks are persisted.
+    Notes get no reply, so their stream is the `done` event alone.
+    The note lookup and OpenAI request happen before streaming starts, so their
+    errors still surface as regular HTTP errors.
+    """
+    note, history, new_note_blocks = _add_user_note_block(session, id, note_block)
+    # The user's block is saved before any model call, together with its block id,
+    # so it survives a failed reply or a client that disconnects mid-stream
+    _save_note_blocks(session, id, new_note_blocks)
+
+    if note_block.is_note:
+        return iter([_sse_event("done", {'status': 'ok', 'new_note_blocks': new_note_blocks})])
+
+    api_messages = _build_api_messages(session, id, history, note_block)
+    cache_key = _response_cache_key(api_messages)
+    # Regenerating asks for a fresh reply, which then replaces the cached one
+    cached_response = None if note_block.regenerate else _get_cached_response(session, cache_key)
+    # Store a new summary, if any, and don't hold a DB connection for the length of the stream
+    session.commit()
+    if cached_response is None:
+        deltas = _response_deltas(_create_response_stream(id, api_messages))
+    else:
+        # A cached reply is sent as a single delta
+        deltas = iter([cached_response])
 
+    def events() -> Iterator[str]:
+        parts = []
+        for delta in deltas:
+            parts.append(delta)
+            yield _sse_event("delta", {"content": delta})
 
-def get_first(iterable, value=None, key=None, default=None):
-    match value is None, callable(key):
-        case (True, True):
-            gen = (elem for elem in iterable if key(elem))
-        case (False, True):
-            gen = (elem for elem in iterable if key(elem) == value)
-        case (True, False):
-            gen = (elem for elem in iterable if elem)
-        case (False, False):
-            gen = (elem for elem in iterable if elem == value)
+        assistant_response = ''.join(parts)
+        if cached_response is None:
+            _cache_response(session, cache_key, assistant_response)
+        _add_assistant_note_block(note, history, new_note_blocks, assistant_response)
+        _save_note_blocks(session, id, new_note_blocks[1:])
+        yield _sse_event("done", {'status': 'ok', 'new_note_blocks': new_note_blocks})
 
-    return next(gen, default)
+    return events()
 
 
 def update_note_block(
@@ -253,60 +374,27 @@ def update_note_block(
     payload: NoteBlockUpdate,
 ) -> dict:
     """Update an existing note block."""
-    import re
-    
-    note = session.get(Note, note_id)
-    if not note:
-        raise HTTPException(status_code=404, detail="Note not found")
-
-    history = note.history or {}
-    content = _ensure_history_content(history)
-
-    target_note_block = get_first(content, key=lambda block: NoteBlock.model_validate(block).id == note_block_id)
-    if target_note_block is None:
-        raise HTTPException(status_code=404, detail="Note block not found")
-
-    updated = False
-    now = datetime.utcnow().isoformat()
+    _assert_note_exists(session, note_id)
 
+    fields = {}
     if payload.block is not None:
-        target_note_block['content'] = payload.block
-        
+        fields['content'] = payload.block
         # Rescan for image references when content is updated
-        image_refs = re.findall(r'@image:(\d+)', payload.block)
-        target_note_block['image_ids'] = [int(img_id) for img_id in image_refs]
-        
-        updated = True
-
-    if updated:
-        target_note_block['updated_at'] = now
+        fields['image_ids'] = [int(img_id) for img_id in IMAGE_REF_RE.findall(payload.block)]
+        fields['updated_at'] = utc_now().isoformat()
 
-        history['content'] = content
-        session.exec(
-            update(Note)
-            .where(Note.id == note_id)
-            .values(history=history)
-        )
-        session.commit()
+    # Only the changed fields are sent; the rest of the history stays in the database
+    if not update_note_block_fields(session, note_id, note_block_id, fields):
+        raise HTTPException(status_code=404, detail="Note block not found")
+    session.commit()
 
     return {'status': 'ok'}
 
 
 def delete_note_block(session: Session, note_id: int, note_block_id: int) -> dict:
     """Remove a note block from note history."""
-    note = session.get(Note, note_id)
-    if not note:
-        raise HTTPException(status_code=404, detail="Note not found")
-
-    history = note.history or {}
-    content = _ensure_history_content(history)
-    content = list(filter(lambda block: NoteBlock.model_validate(block).id != note_block_id, content))
-    history['content'] = content
-    session.exec(
-        update(Note)
-        .where(Note.id == note_id)
-        .values(history=history)
-    )
+    _assert_note_exists(session, note_id)
+    remove_note_block(session, note_id, note_block_id)
     session.commit()
 
     return {'status': 'ok'}
@@ -320,13 +408,31 @@ ALLOWED_IMAGE_TYPES = {
     "image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp", "image/bmp"
 }
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+# When set (e.g. "/internal_images/"), image files are handed to an nginx internal location
+# aliased to UPLOAD_DIR via X-Accel-Redirect, which sends them with sendfile(2)
+IMAGE_ACCEL_REDIRECT_PREFIX = os.environ.get("IMAGE_ACCEL_REDIRECT_PREFIX")
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+# Identical uploads share one content-hashed file; placing or removing a file and
+# committing the rows that reference it happen under this lock, so they don't interleave
+_image_files_lock = threading.Lock()
+
+
+def _remove_unreferenced_image_file(session: Session, file_path: str) -> None:
+    """Delete an image file from the filesystem once no image row references it."""
+    if session.exec(select(NoteImage.id).where(NoteImage.file_path == file_path)).first() is None:
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass  # File might already be deleted
+
+class ImageFileResponse(FileResponse):
+    """FileResponse reading in 1MB chunks instead of 64KB, so most images go out in a few sends."""
+    chunk_size = UPLOAD_CHUNK_SIZE
 
 async def upload_note_image(session: Session, note_id: int, file: UploadFile) -> NoteImageResponse:
     """Upload an image to a note."""
     # Verify note exists
-    note = session.get(Note, note_id)
-    if not note:
-        raise HTTPException(status_code=404, detail="Note not found")
+    _assert_note_exists(session, note_id)
     
     # Validate file type
     if file.content_type not in ALLOWED_IMAGE_TYPES:
@@ -335,36 +441,53 @@ async def upload_note_image(session: Session, note_id: int, file: UploadFile) ->
             detail=f"Invalid file type. Allowed types: {', '.join(ALLOWED_IMAGE_TYPES)}"
         )
     
-    # Read file content and validate size
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
-        )
-    
-    # Generate unique filename
+    # Stream file to disk in chunks under a temporary name, validating size and hashing as we go
     file_extension = Path(file.filename).suffix.lower()
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = UPLOAD_DIR / unique_filename
-    
-    # Save file
-    with open(file_path, 'wb') as f:
-        f.write(content)
-    
-    # Create database record
-    note_image = NoteImage(
-        note_id=note_id,
-        filename=unique_filename,
-        original_filename=file.filename,
-        file_path=str(file_path),
-        mime_type=file.content_type,
-        file_size=len(content)
-    )
-    
-    session.add(note_image)
-    session.commit()
-    session.refresh(note_image)
+    temp_path = UPLOAD_DIR / f"{uuid.uuid4()}.part"
+    hasher = hashlib.sha256()
+    file_size = 0
+    try:
+        with open(temp_path, 'wb', buffering=UPLOAD_CHUNK_SIZE) as f:
+            def write_chunk(chunk: bytes) -> None:
+                hasher.update(chunk)
+                f.write(chunk)
+
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                file_size += len(chunk)
+                if file_size > MAX_FILE_SIZE:
+                    raise HTTPException(
+                        status_code=400, 
+                        detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
+                    )
+                # Hashing and disk writes run in the threadpool so the event loop isn't blocked
+                await run_in_threadpool(write_chunk, chunk)
+
+        # The content hash names the file, so identical images share one file across notes
+        unique_filename = f"{hasher.hexdigest()}{file_extension}"
+        file_path = UPLOAD_DIR / unique_filename
+        note_image = NoteImage(
+            note_id=note_id,
+            filename=unique_filename,
+            original_filename=file.filename,
+            file_path=str(file_path),
+            mime_type=file.content_type,
+            file_size=file_size
+        )
+
+        with _image_files_lock:
+            os.replace(temp_path, file_path)
+            try:
+                session.add(note_image)
+                session.commit()
+            except BaseException:
+                # Without its row the file is only kept if another image still uses it
+                session.rollback()
+                _remove_unreferenced_image_file(session, str(file_path))
+                raise
+    except BaseException:
+        # Don't leave a partial upload behind, whatever interrupted it
+        temp_path.unlink(missing_ok=True)
+        raise
     
     return NoteImageResponse(
         id=note_image.id,
@@ -378,32 +501,25 @@ async def upload_note_image(session: Session, note_id: int, file: UploadFile) ->
 def get_note_images(session: Session, note_id: int) -> List[NoteImageResponse]:
     """Get all images for a note."""
     # Verify note exists
-    note = session.get(Note, note_id)
-    if not note:
-        raise HTTPException(status_code=404, detail="Note not found")
+    _assert_note_exists(session, note_id)
     
     images = session.exec(
-        select(NoteImage).where(NoteImage.note_id == note_id).order_by(NoteImage.uploaded_at.desc())
+        select(
+            NoteImage.id,
+            NoteImage.filename,
+            NoteImage.original_filename,
+            NoteImage.mime_type,
+            NoteImage.file_size,
+            NoteImage.uploaded_at,
+        ).where(NoteImage.note_id == note_id).order_by(NoteImage.uploaded_at.desc())
     ).all()
     
-    return [
-        NoteImageResponse(
-            id=img.id,
-            filename=img.filename,
-            original_filename=img.original_filename,
-            mime_type=img.mime_type,
-            file_size=img.file_size,
-            uploaded_at=img.uploaded_at
-        )
-        for img in images
-    ]
+    return [NoteImageResponse.model_validate(img._mapping) for img in images]
 
 def delete_note_image(session: Session, note_id: int, image_id: int) -> dict:
     """Delete an image from a note."""
     # Verify note exists
-    note = session.get(Note, note_id)
-    if not note:
-        raise HTTPException(status_code=404, detail="Note not found")
+    _assert_note_exists(session, note_id)
     
     # Get image
     image = session.exec(
@@ -413,41 +529,56 @@ def delete_note_image(session: Session, note_id: int, image_id: int) -> dict:
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
     
-    # Delete file from filesystem
-    try:
-        os.remove(image.file_path)
-    except OSError:
-        pass  # File might already be deleted
-    
-    # Delete from database
-    session.delete(image)
-    session.commit()
+    # Delete from database, then the file once nothing references it
+    file_path = image.file_path
+    with _image_files_lock:
+        session.delete(image)
+        session.commit()
+        _remove_unreferenced_image_file(session, file_path)
     
     return {"status": "ok"}
 
-def get_note_image_file(session: Session, note_id: int, image_id: int) -> FileResponse:
+def get_note_image_file(session: Session, note_id: int, image_id: int) -> Response:
     """Get the actual image file."""
     # Verify note exists
-    note = session.get(Note, note_id)
-    if not note:
-        raise HTTPException(status_code=404, detail="Note not found")
+    _assert_note_exists(session, note_id)
     
     # Get image
     image = session.exec(
-        select(NoteImage).where(NoteImage.id == image_id, NoteImage.note_id == note_id)
+        select(NoteImage.file_path, NoteImage.mime_type, NoteImage.original_filename)
+        .where(NoteImage.id == image_id, NoteImage.note_id == note_id)
     ).first()
     
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
     
-    # Check if file exists
-    if not os.path.exists(image.file_path):
+    if IMAGE_ACCEL_REDIRECT_PREFIX:
+        # The proxy reads the file itself; send only the headers FileResponse would set
+        quoted_filename = quote(image.original_filename)
+        if quoted_filename != image.original_filename:
+            content_disposition = f"attachment; filename*=utf-8''{quoted_filename}"
+        else:
+            content_disposition = f'attachment; filename="{image.original_filename}"'
+        return Response(
+            media_type=image.mime_type,
+            headers={
+                "X-Accel-Redirect": f"{IMAGE_ACCEL_REDIRECT_PREFIX}{Path(image.file_path).name}",
+                "Content-Disposition": content_disposition,
+            },
+        )
+    
+    # The stat doubles as the existence check and is handed to the response,
+    # which would otherwise stat the file again before sending it
+    try:
+        stat_result = os.stat(image.file_path)
+    except OSError:
         raise HTTPException(status_code=404, detail="Image file not found")
     
-    return FileResponse(
+    return ImageFileResponse(
         path=image.file_path,
         media_type=image.mime_type,
-        filename=image.original_filename
+        filename=image.original_filename,
+        stat_result=stat_result
     )
 
 
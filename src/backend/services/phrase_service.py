@@ -1,6 +1,7 @@
 import os
+import re
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from fastapi import HTTPException
 from openai import OpenAI
 from sqlmodel import Session
@@ -12,6 +13,20 @@ from .text_processor import TextProcessor, DatabaseSaver
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Tagged sections of translation and generation responses
+PHRASE_RE = re.compile(r"<phrase>(.*?)</phrase>", re.S)
+PHRASE_EXAMPLE_RE = re.compile(r"<phrase_example>(.*?)</phrase_example>", re.S)
+PHRASE_TRANSLATION_RE = re.compile(r"<phrase_translation>(.*?)</phrase_translation>", re.S)
+EXAMPLE_SENTENCE_RE = re.compile(r"<example_sentence>(.*?)</example_sentence>", re.S)
+EXAMPLE_TRANSLATION_RE = re.compile(r"<example_translation>(.*?)</example_translation>", re.S)
+
+
+def _tagged_text(pattern: re.Pattern, text: str) -> str:
+    """Return the stripped text inside the pattern's tags, or "" if they are missing."""
+    match = pattern.search(text)
+    return match.group(1).strip() if match else ""
+
+
 # Initialize OpenAI client
 client = OpenAI(
     api_key=os.environ.get("OPENAI_API_KEY"),
@@ -23,7 +38,8 @@ def get_phrase_with_example_and_translation(
     target_language: str = "en",
     proficiency: str = "intermediate",
     session: Optional[Session] = None,
-    use_gpt_translation: bool = False
+    use_gpt_translation: bool = False,
+    generated_sentences: Optional[List[str]] = None
 ) -> Dict[str, str]:
     """
     Get phrase translation and example sentence with translation.
@@ -36,6 +52,8 @@ def get_phrase_with_example_and_translation(
         proficiency: Proficiency level for sentence complexity
         session: Database session for searching existing sentences
         use_gpt_translation: Whether to use GPT for translation instead of Google Translate
+        generated_sentences: If given, generated example sentences are appended here instead
+            of being saved, so the caller can save them later with save_generated_sentence
         
     Returns:
         Dictionary with word, word_translation, example_phrase, example_phrase_translation
@@ -77,32 +95,12 @@ def get_phrase_with_example_and_translation(
                     "phrase_translation": generated["phrase_translation"],
                     "example_translation": generated["example_translation"]
                 }
-
             
-            # Save the generated sentence to database if session is provided
-            if session:
-                try:
-                    text_processor = TextProcessor()
-                    db_saver = DatabaseSaver(session)
-                    
-                    # Process the generated sentence for tagging
-                    processed_sentence = text_processor.process_sentence(example_sentence, language)
-                    
-                    # Save to database with ChatGpt source
-                    text_entry, phrase_entry = db_saver.save_sentence(
-                        sentence=example_sentence,
-                        language=language,
-                        source="ChatGpt",
-                        title=f"Generated Examples - {language.upper()}",
-                        category="generated",
-                        words_data=processed_sentence["words"]
-                    )
-                    get_sentence_retriever(proficiency).add_phrase_to_index(text_entry, phrase_entry, language)
-                    
-                    
-                except Exception:
-                    logger.exception(f"Failed to save generated sentence to database:")
-                    # Don't fail the main request if saving fails
+            # Save the generated sentence, or hand it to the caller to save later
+            if generated_sentences is not None:
+                generated_sentences.append(example_sentence)
+            elif session:
+                save_generated_sentence(session, example_sentence, language, proficiency)
                     
         except Exception as e:
             logger.exception(f"Failed to generate example sentence:")
@@ -134,6 +132,33 @@ def get_phrase_with_example_and_translation(
         "example_phrase_translation": translations["example_translation"]
     }
 
+def save_generated_sentence(session: Session, sentence: str, language: str, proficiency: str) -> None:
+    """
+    Save a generated example sentence and add it to the sentence index.
+
+    Failures are logged and swallowed; a missing example in the database must not
+    fail the lookup that generated it.
+    """
+    try:
+        text_processor = TextProcessor()
+        db_saver = DatabaseSaver(session)
+        
+        # Process the generated sentence for tagging
+        processed_sentence = text_processor.process_sentence(sentence, language)
+        
+        # Save to database with ChatGpt source
+        text_entry, phrase_entry = db_saver.save_sentence(
+            sentence=sentence,
+            language=language,
+            source="ChatGpt",
+            title=f"Generated Examples - {language.upper()}",
+            category="generated",
+            words_data=processed_sentence["words"]
+        )
+        get_sentence_retriever(proficiency).add_phrase_to_index(text_entry, phrase_entry, language)
+    except Exception:
+        logger.exception(f"Failed to save generated sentence to database:")
+
 def translate_phrase_and_example_with_google(
     phrase: str, 
     example_sentence: str, 
@@ -156,32 +181,10 @@ def translate_phrase_and_example_with_google(
     helper = GoogleTranslateHelper()
     translation = helper.translate(formatted_text, target_language)
     
-    # Parse the translation to extract phrase and example translations
-    phrase_translation = ""
-    example_translation = ""
-    
-    # Simple parsing - look for the tags in the translation
-    if "<phrase>" in translation and "</phrase>" in translation:
-        start = translation.find("<phrase>") + 8
-        end = translation.find("</phrase>")
-        phrase_translation = translation[start:end].strip()
-    
-    if "<phrase_example>" in translation and "</phrase_example>" in translation:
-        start = translation.find("<phrase_example>") + 16
-        end = translation.find("</phrase_example>")
-        example_translation = translation[start:end].strip()
-    
-    # Fallback if parsing fails
-    if not phrase_translation or not example_translation:
-        # Split by space and try to separate
-        parts = translation.replace("<phrase>", "").replace("</phrase>", "").replace("<phrase_example>", "").replace("</phrase_example>", "").strip().split()
-        if len(parts) >= 2:
-            # Rough heuristic: assume first part is phrase translation
-            phrase_translation = parts[0]
-            example_translation = " ".join(parts[1:])
-        else:
-            phrase_translation = translation
-            example_translation = translation
+    # Parse the translation to extract phrase and example translations;
+    # a section whose tags didn't survive translation is left empty
+    phrase_translation = _tagged_text(PHRASE_RE, translation)
+    example_translation = _tagged_text(PHRASE_EXAMPLE_RE, translation)
     
     return {
         "phrase_translation": phrase_translation,
@@ -230,18 +233,8 @@ def translate_phrase_and_example_with_gpt(
     content = response.choices[0].message.content.strip()
     
     # Parse the response
-    phrase_translation = ""
-    example_translation = ""
-    
-    if "<phrase>" in content and "</phrase>" in content:
-        start = content.find("<phrase>") + 8
-        end = content.find("</phrase>")
-        phrase_translation = content[start:end].strip()
-    
-    if "<phrase_example>" in content and "</phrase_example>" in content:
-        start = content.find("<phrase_example>") + 16
-        end = content.find("</phrase_example>")
-        example_translation = content[start:end].strip()
+    phrase_translation = _tagged_text(PHRASE_RE, content)
+    example_translation = _tagged_text(PHRASE_EXAMPLE_RE, content)
     
     if not phrase_translation or not example_translation:
         raise ValueError("Failed to parse translations from GPT response")
@@ -306,24 +299,9 @@ def generate_example_sentence_with_gpt(
         content = response.choices[0].message.content.strip()
         
         # Parse the response
-        example_phrase = ""
-        phrase_translation = ""
-        example_translation = ""
-        
-        if "<example_sentence>" in content and "</example_sentence>" in content:
-            start = content.find("<example_sentence>") + 18
-            end = content.find("</example_sentence>")
-            example_phrase = content[start:end].strip()
-        
-        if "<phrase_translation>" in content and "</phrase_translation>" in content:
-            start = content.find("<phrase_translation>") + 20
-            end = content.find("</phrase_translation>")
-            phrase_translation = content[start:end].strip()
-        
-        if "<example_translation>" in content and "</example_translation>" in content:
-            start = content.find("<example_translation>") + 21
-            end = content.find("</example_translation>")
-            example_translation = content[start:end].strip()
+        example_phrase = _tagged_text(EXAMPLE_SENTENCE_RE, content)
+        phrase_translation = _tagged_text(PHRASE_TRANSLATION_RE, content)
+        example_translation = _tagged_text(EXAMPLE_TRANSLATION_RE, content)
         
         if not example_phrase:
             raise ValueError("Failed to parse example sentence from GPT response")
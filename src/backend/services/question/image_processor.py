@@ -1,12 +1,31 @@
 """Image processor for handling image references in content."""
 
-import re
 import base64
+import mmap
 import os
 from dataclasses import dataclass
-from typing import List, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional, Set
 from sqlmodel import Session, select
-from backend.models.note import NoteImage
+from backend.models.note import IMAGE_REF_RE, NoteImage
+
+
+# Encoded images can be several MB each, so keep the cache small
+@lru_cache(maxsize=32)
+def encoded_image(image_id: int, mtime_ns: int, path: str, mime_type: str) -> str:
+    """
+    Return the image as a base64 data URL.
+
+    image_id and mtime_ns are part of the cache key so a replaced file is re-read.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:  # mmap cannot map an empty file
+            image_data = b""
+        else:
+            # Encode straight from the mapped file instead of reading a copy into memory first
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                image_data = base64.b64encode(mapped)
+    return f"data:{mime_type};base64,{image_data.decode('ascii')}"
 
 
 @dataclass
@@ -42,61 +61,63 @@ class ImageProcessor:
         Returns:
             ProcessedContent with processed text and image data for AI
         """
-        processed_text = content
         image_contents = []
         
         # Find all image references
-        image_refs = re.findall(r'@image:(\d+)', content)
+        image_ids = {int(img_id) for img_id in IMAGE_REF_RE.findall(content)}
+        if not image_ids:
+            return ProcessedContent(text=content, image_contents=image_contents)
+        
+        # Get all referenced images in one query
+        images_by_id = self._get_image_records(image_ids, note_id)
         
-        for img_id in image_refs:
-            image_data = self._load_image(int(img_id), note_id)
-            if image_data:
-                image_contents.append(image_data)
-                # Replace reference with description
-                image = self._get_image_record(int(img_id), note_id)
-                if image:
-                    processed_text = processed_text.replace(
-                        f"@image:{img_id}",
-                        f"[Image: {image.original_filename}]"
-                    )
+        def describe_image(match) -> str:
+            image = images_by_id.get(int(match.group(1)))
+            image_data = self._load_image(image)
+            if not image_data:
+                return match.group(0)
+            image_contents.append(image_data)
+            # Replace reference with description
+            return f"[Image: {image.original_filename}]"
+        
+        # One pass collects the images and rewrites every reference
+        processed_text = IMAGE_REF_RE.sub(describe_image, content)
         
         return ProcessedContent(
             text=processed_text,
             image_contents=image_contents
         )
     
-    def _get_image_record(self, image_id: int, note_id: int) -> Optional[NoteImage]:
-        """Get image record from database."""
-        return self.session.exec(
+    def _get_image_records(self, image_ids: Set[int], note_id: int) -> Dict[int, NoteImage]:
+        """Get the note's image records for the given IDs, keyed by ID."""
+        images = self.session.exec(
             select(NoteImage).where(
-                NoteImage.id == image_id,
+                NoteImage.id.in_(image_ids),
                 NoteImage.note_id == note_id
             )
-        ).first()
+        ).all()
+        return {image.id: image for image in images}
     
-    def _load_image(self, image_id: int, note_id: int) -> Optional[dict]:
+    def _load_image(self, image: Optional[NoteImage]) -> Optional[dict]:
         """
         Load and encode image for AI API.
         
         Args:
-            image_id: ID of the image
-            note_id: ID of the note
+            image: Image record, or None if it doesn't belong to the note
             
         Returns:
             Dict with image data for OpenAI API, or None if image not found
         """
         try:
-            image = self._get_image_record(image_id, note_id)
-            if not image or not os.path.exists(image.file_path):
+            if not image:
                 return None
             
-            with open(image.file_path, 'rb') as f:
-                image_data = base64.b64encode(f.read()).decode()
-            
+            # Read and encode image (cached until the file changes); a missing file raises OSError
+            mtime_ns = os.stat(image.file_path).st_mtime_ns
             return {
                 "type": "image_url",
                 "image_url": {
-                    "url": f"data:{image.mime_type};base64,{image_data}"
+                    "url": encoded_image(image.id, mtime_ns, image.file_path, image.mime_type)
                 }
             }
         except (ValueError, TypeError, OSError):
@@ -37,10 +37,11 @@ class OpenAIProvider:
             stream=True,
         )
         
-        full_response = ""
+        # Collect deltas and join once; repeated += copies the accumulated text
+        parts = []
         for chunk in response_stream:
             delta = chunk.choices[0].delta.content
             if delta:
-                full_response += delta
+                parts.append(delta)
         
-        return full_response
+        return ''.join(parts)
@@ -1,12 +1,12 @@
 """Question service for processing questions about notes."""
 
 from typing import Optional, List, Tuple
-from datetime import datetime
-from sqlmodel import Session, update
+from sqlmodel import Session
 from fastapi import HTTPException
 
-from backend.models.note import Note, NoteBlock, QuestionCreate
-from backend.constants import SYSTEM_PROMPT
+from backend.models.note import Note, NoteBlock, QuestionCreate, utc_now
+from backend.constants import SYSTEM_MESSAGE
+from backend.services.note_history import append_note_blocks
 from backend.services.question.image_processor import ImageProcessor
 from backend.services.question.openai_provider import OpenAIProvider
 
@@ -79,11 +79,13 @@ class QuestionService:
             parent_note_block_id=question_data.parent_note_block_id
         )
         
-        self._save_note_block(note_id, note, qa_block)
+        # Dump once; the same dict is stored and returned
+        qa_block_data = qa_block.model_dump(mode="json")
+        self._save_note_block(note_id, qa_block_data)
         
         return {
             'status': 'ok',
-            'qa_block': qa_block.model_dump(mode="json")
+            'qa_block': qa_block_data
         }
     
     # Private helper methods
@@ -115,11 +117,8 @@ class QuestionService:
         """Build complete message list for OpenAI API."""
         messages = []
         
-        # Add system prompt
-        messages.append({
-            "role": "developer",
-            "content": SYSTEM_PROMPT
-        })
+        # Add system prompt (shared object so the prompt prefix stays cacheable)
+        messages.append(SYSTEM_MESSAGE)
         
         # Add note history (only actual notes, not questions)
         content = note_history.get('content', [])
@@ -177,7 +176,7 @@ Then provide your detailed answer below."""
         parent_note_block_id: Optional[int]
     ) -> NoteBlock:
         """Create a Q&A note block from parsed content."""
-        timestamp = datetime.utcnow()
+        timestamp = utc_now()
         return NoteBlock(
             id=note.get_new_note_block_id(),
             role="assistant",
@@ -190,17 +189,7 @@ Then provide your detailed answer below."""
             block_type="qa_response"
         )
     
-    def _save_note_block(self, note_id: int, note: Note, note_block: NoteBlock) -> None:
-        """Save note block to note history."""
-        history = note.history or {}
-        content = history.get('content', [])
-        
-        content.append(note_block.model_dump(mode="json"))
-        history['content'] = content
-        
-        self.session.exec(
-            update(Note)
-            .where(Note.id == note_id)
-            .values(history=history)
-        )
+    def _save_note_block(self, note_id: int, note_block: dict) -> None:
+        """Append a dumped note block to note history without rewriting it."""
+        append_note_blocks(self.session, note_id, [note_block])
         self.session.commit()
@@ -6,13 +6,17 @@ These fixtures follow the refactoring pattern of using real database sessions an
 while only mocking external dependencies.
 """
 
+import json
 import pytest
 import tempfile
 import shutil
 from pathlib import Path
+from types import SimpleNamespace
 from sqlmodel import Session, SQLModel, create_engine
 from sqlalchemy.pool import StaticPool
 
+from backend.database import json_serializer, json_deserializer
+
 from backend.models.note import Note
 from backend.models.dict_english import Dictionary
 from backend.models.dict_spanish import SpanishDictionary
@@ -26,6 +30,8 @@ def test_engine():
         "sqlite:///:memory:",
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
+        json_serializer=json_serializer,
+        json_deserializer=json_deserializer,
     )
     SQLModel.metadata.create_all(engine)
     return engine
@@ -492,3 +498,15 @@ def create_note(test_session, name, history=None):
 def create_chat(test_session, name, history=None):
     """Helper function to create chats in the database. DEPRECATED: Use create_note instead."""
     return create_note(test_session, name, history)
+
+
+def stream_chunk(content):
+    """Build a streamed chat completion chunk carrying one content delta."""
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+def done_payload(events) -> dict:
+    """Consume a note block event stream and return the payload of its final done event."""
+    *_, done = events
+    assert done.startswith("event: done\n")
+    return json.loads(done.split("data: ", 1)[1])
@@ -0,0 +1,33 @@
+from sqlalchemy import inspect, text
+
+from backend.database import (
+    _naive_timestamp_columns, convert_naive_timestamp_columns, create_missing_indexes
+)
+
+
+def test_create_missing_indexes_adds_indexes_to_existing_tables(test_engine):
+    """Test that indexes dropped from (or never created on) existing tables are created."""
+    with test_engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_dictionary_word"))
+        connection.execute(text("DROP INDEX ix_noteimage_note_id_uploaded_at"))
+
+    create_missing_indexes(test_engine)
+    # Safe to run again once the indexes exist
+    create_missing_indexes(test_engine)
+
+    inspector = inspect(test_engine)
+    assert "ix_dictionary_word" in {index["name"] for index in inspector.get_indexes("dictionary")}
+    assert "ix_noteimage_note_id_uploaded_at" in {index["name"] for index in inspector.get_indexes("noteimage")}
+
+
+def test_naive_timestamp_columns_lists_timezone_aware_model_columns(test_engine):
+    """Test that timezone-aware model columns stored without a time zone are found."""
+    # SQLite has no timestamptz, so every timezone-aware column reads back as naive
+    assert sorted(_naive_timestamp_columns(test_engine)) == [
+        ("noteimage", "uploaded_at"),
+        ("noteresponsecache", "created_at"),
+    ]
+
+    # Only PostgreSQL columns are converted; SQLite is left as it is
+    convert_naive_timestamp_columns(test_engine)
+    assert len(_naive_timestamp_columns(test_engine)) == 2
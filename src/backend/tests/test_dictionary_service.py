@@ -1,3 +1,4 @@
+import json
 import pytest
 from unittest.mock import patch
 from sqlmodel import Session, SQLModel, create_engine, select
@@ -5,8 +6,8 @@ from sqlalchemy.pool import StaticPool
 from fastapi import HTTPException
 
 from backend.services.dictionary_service import (
-    DictionaryApiClient, parse_english_word_definition,
-    get_english_word_definition
+    DictionaryApiClient, WordNotFound, parse_english_word_definition,
+    get_english_word_definition, _failed_lookups
 )
 from backend.models.dict_english import (
     EnglishDialect, Dictionary, EnglishWordDefinition, 
@@ -83,17 +84,14 @@ class TestDictionaryApiClient:
             ]
         }
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_define_success_simple(self, mock_get, sample_api_responses):
         """Test successful API call with simple word."""
         # Mock HTTP response
         class MockResponse:
             def __init__(self, json_data, status_code=200):
-                self.json_data = json_data
+                self.content = json.dumps(json_data).encode()
                 self.status_code = status_code
-            
-            def json(self):
-                return self.json_data
         
         mock_get.return_value = MockResponse(sample_api_responses["simple"])
         
@@ -107,16 +105,13 @@ class TestDictionaryApiClient:
         assert "dictionaryapi.dev" in call_args[0][0]
         assert "hello" in call_args[0][0]
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_define_success_complex(self, mock_get, sample_api_responses):
         """Test successful API call with complex word."""
         class MockResponse:
             def __init__(self, json_data, status_code=200):
-                self.json_data = json_data
+                self.content = json.dumps(json_data).encode()
                 self.status_code = status_code
-            
-            def json(self):
-                return self.json_data
         
         mock_get.return_value = MockResponse(sample_api_responses["complex"])
         
@@ -126,7 +121,7 @@ class TestDictionaryApiClient:
         assert len(result[0]["meanings"]) == 2  # Verb and noun
         assert len(result[0]["phonetics"]) == 2  # US and UK pronunciations
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_define_http_error_404(self, mock_get):
         """Test API call with 404 error."""
         mock_response = type('MockResponse', (), {
@@ -140,7 +135,7 @@ class TestDictionaryApiClient:
         
         assert "Error fetching definition" in str(exc_info.value)
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_define_http_error_500(self, mock_get):
         """Test API call with server error."""
         mock_response = type('MockResponse', (), {
@@ -154,7 +149,7 @@ class TestDictionaryApiClient:
         
         assert "Error fetching definition" in str(exc_info.value)
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_define_network_error(self, mock_get):
         """Test API call with network error."""
         mock_get.side_effect = ConnectionError("Network unreachable")
@@ -162,15 +157,13 @@ class TestDictionaryApiClient:
         with pytest.raises(ConnectionError):
             DictionaryApiClient.define("test")
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_define_json_decode_error(self, mock_get):
         """Test API call with malformed JSON response."""
         class MockResponse:
             def __init__(self):
                 self.status_code = 200
-            
-            def json(self):
-                raise ValueError("Invalid JSON")
+                self.content = b"<html>Invalid JSON</html>"
         
         mock_get.return_value = MockResponse()
         
@@ -377,6 +370,35 @@ class TestParseEnglishWordDefinition:
         assert result.audio is None
         assert result.dialect == EnglishDialect.us  # Default
     
+    def test_parse_matches_validated_definition(self, sample_api_data):
+        """Test that the unvalidated parse equals a validated round-trip of itself."""
+        result = parse_english_word_definition(sample_api_data["complex"], "book")
+        
+        assert result == EnglishWordDefinition.model_validate(result.model_dump())
+        assert isinstance(result.entries[0].pos_groups[0].senses[0], EnglishSense)
+    
+    def test_parse_null_fields_round_trip(self):
+        """Test that null API values are coerced so the cached definition validates."""
+        api_data = [
+            {
+                "word": "test",
+                "phonetics": None,
+                "meanings": [
+                    {
+                        "partOfSpeech": None,
+                        "definitions": [{"definition": None, "synonyms": None, "antonyms": None}]
+                    }
+                ]
+            }
+        ]
+
+        result = parse_english_word_definition(api_data, "test")
+
+        assert result == EnglishWordDefinition.model_validate(result.model_dump())
+        sense = result.entries[0].pos_groups[0].senses[0]
+        assert sense.context_en == ""
+        assert sense.synonyms == []
+
     def test_parse_malformed_data_graceful_handling(self):
         """Test graceful handling of malformed API data."""
         malformed_data = [
@@ -409,6 +431,13 @@ class TestParseEnglishWordDefinition:
 class TestEnglishWordDefinitionService:
     """Test the complete dictionary service with real database operations."""
     
+    @pytest.fixture(autouse=True)
+    def clear_failed_lookups(self):
+        """Failed lookups are remembered per process; keep tests independent."""
+        _failed_lookups.clear()
+        yield
+        _failed_lookups.clear()
+    
     @pytest.fixture
     def sample_dictionary_entries(self):
         """Provide sample dictionary entries for database tests."""
@@ -633,6 +662,45 @@ class TestEnglishWordDefinitionService:
         # API should only be called for the new word
         mock_define.assert_called_once_with("new")
     
+    @patch('backend.services.dictionary_service.DictionaryApiClient.define')
+    def test_get_definition_multiple_api_calls(self, mock_define, test_session):
+        """Test that several uncached words are all fetched, returned in order and cached."""
+        def define(word):
+            if word == "broken":
+                raise Exception("API Error")
+            return [{"word": word, "phonetics": [], "meanings": []}]
+        mock_define.side_effect = define
+        
+        result = get_english_word_definition(["one", "broken", "two", "one"], test_session, read_only=False)
+        
+        assert [d.word for d in result] == ["one", "broken", "two", "one"]
+        assert sorted(call.args[0] for call in mock_define.call_args_list) == ["broken", "one", "two"]
+        cached = test_session.exec(select(Dictionary.word)).all()
+        assert sorted(cached) == ["one", "two"]
+    
+    @patch('backend.services.dictionary_service.DictionaryApiClient.define')
+    def test_get_definition_failed_lookup_not_retried_within_ttl(self, mock_define, test_session):
+        """Test that a transient API failure is remembered in-process, not cached in the DB."""
+        mock_define.side_effect = Exception("API Error")
+        
+        first = get_english_word_definition(["flaky"], test_session, read_only=False)
+        second = get_english_word_definition(["flaky"], test_session, read_only=False)
+        
+        assert first[0].entries == [] and second[0].entries == []
+        mock_define.assert_called_once_with("flaky")
+        assert test_session.exec(select(Dictionary.word)).all() == []
+    
+    @patch('backend.services.dictionary_service.DictionaryApiClient.define')
+    def test_get_definition_unknown_word_cached_as_empty(self, mock_define, test_session):
+        """Test that a word the API does not know is cached as an empty definition."""
+        mock_define.side_effect = WordNotFound("Error fetching definition for word: qwzx")
+        
+        result = get_english_word_definition(["qwzx"], test_session, read_only=False)
+        
+        assert result[0].entries == []
+        cached = test_session.exec(select(Dictionary.word)).all()
+        assert cached == ["qwzx"]
+    
     def test_get_definition_empty_word_list(self, test_session):
         """Test handling of empty word list."""
         result = get_english_word_definition([], test_session)
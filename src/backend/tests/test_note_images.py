@@ -3,6 +3,7 @@ import os
 import base64
 import asyncio
 from datetime import datetime, timedelta, timezone
+from pathlib import Path
 
 import pytest
 from unittest.mock import patch
@@ -19,6 +20,7 @@ from backend.services.notes_service import (
     get_note_image_file,
     send_note_block,
 )
+from backend.tests.conftest import done_payload, stream_chunk
 
     
 
@@ -96,6 +98,8 @@ async def test_upload_note_image_too_large(test_session, temp_directory, monkeyp
     monkeypatch.setattr(notes_service, "UPLOAD_DIR", temp_directory, raising=False)
     # Make MAX_FILE_SIZE small to avoid big allocations
     monkeypatch.setattr(notes_service, "MAX_FILE_SIZE", 10, raising=False)
+    # Read in several chunks so the limit is hit mid-stream
+    monkeypatch.setattr(notes_service, "UPLOAD_CHUNK_SIZE", 4, raising=False)
 
     note = Note(name="Too Large", history={"content": []})
     test_session.add(note)
@@ -112,6 +116,33 @@ async def test_upload_note_image_too_large(test_session, temp_directory, monkeyp
         await upload_note_image(test_session, note.id, upload)
     assert exc.value.status_code == 400
     assert "File too large" in exc.value.detail
+    # The partially written file is removed
+    assert list(temp_directory.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_upload_note_image_read_error_removes_partial_file(test_session, temp_directory, monkeypatch):
+    monkeypatch.setattr(notes_service, "UPLOAD_DIR", temp_directory, raising=False)
+
+    note = Note(name="Broken Upload", history={"content": []})
+    test_session.add(note)
+    test_session.commit()
+    test_session.refresh(note)
+
+    upload = UploadFile(
+        filename="broken.png",
+        file=io.BytesIO(b"x" * 20),
+        headers=Headers({"content-type": "image/png"}),
+    )
+
+    async def failing_read(size=-1):
+        raise OSError("connection reset")
+
+    monkeypatch.setattr(upload, "read", failing_read)
+
+    with pytest.raises(OSError):
+        await upload_note_image(test_session, note.id, upload)
+    assert list(temp_directory.iterdir()) == []
 
 
 def test_get_note_images_ordering(test_session):
@@ -173,6 +204,58 @@ def test_get_note_image_file_returns_fileresponse(test_session, temp_directory):
     assert resp.media_type == "image/png"
 
 
+def test_get_note_image_file_accel_redirect(test_session, temp_directory, monkeypatch):
+    monkeypatch.setattr(notes_service, "IMAGE_ACCEL_REDIRECT_PREFIX", "/internal_images/", raising=False)
+
+    note = Note(name="Accel Serve", history={"content": []})
+    test_session.add(note)
+    test_session.commit()
+    test_session.refresh(note)
+
+    image = NoteImage(
+        note_id=note.id,
+        filename="abc.png",
+        original_filename="my image.png",
+        file_path=str(temp_directory / "abc.png"),
+        mime_type="image/png",
+        file_size=7,
+    )
+    test_session.add(image)
+    test_session.commit()
+    test_session.refresh(image)
+
+    resp = get_note_image_file(test_session, note.id, image.id)
+    # The proxy serves the file; the app sends headers only
+    assert resp.body == b""
+    assert resp.headers["x-accel-redirect"] == "/internal_images/abc.png"
+    assert resp.headers["content-type"] == "image/png"
+    assert resp.headers["content-disposition"] == "attachment; filename*=utf-8''my%20image.png"
+
+
+def test_get_note_image_file_missing_on_disk(test_session, temp_directory):
+    note = Note(name="Missing File", history={"content": []})
+    test_session.add(note)
+    test_session.commit()
+    test_session.refresh(note)
+
+    image = NoteImage(
+        note_id=note.id,
+        filename="gone.png",
+        original_filename="gone.png",
+        file_path=str(temp_directory / "gone.png"),
+        mime_type="image/png",
+        file_size=7,
+    )
+    test_session.add(image)
+    test_session.commit()
+    test_session.refresh(image)
+
+    with pytest.raises(HTTPException) as exc:
+        get_note_image_file(test_session, note.id, image.id)
+    assert exc.value.status_code == 404
+    assert exc.value.detail == "Image file not found"
+
+
 @patch("backend.services.notes_service.client")
 def test_send_note_block_with_image_refs_embeds_and_keeps_original(mock_client, test_session, temp_directory):
     # Prepare note and image on disk
@@ -198,17 +281,10 @@ def test_send_note_block_with_image_refs_embeds_and_keeps_original(mock_client,
     test_session.commit()
     test_session.refresh(image)
 
-    # Mock streaming response
-    class MockChunk:
-        def __init__(self, content):
-            self.choices = [type("obj", (object,), {
-                "delta": type("obj", (object,), {"content": content})()
-            })()]
-
-    mock_client.chat.completions.create.return_value = [MockChunk("OK")] 
+    mock_client.chat.completions.create.return_value = [stream_chunk("OK")] 
 
     msg = NoteBlockCreate(block=f"Here is an image @image:{image.id}")
-    result = send_note_block(test_session, note.id, msg)
+    result = done_payload(send_note_block(test_session, note.id, msg))
 
     # Verify OpenAI call contains image_url with data: URL
     mock_client.chat.completions.create.assert_called_once()
@@ -230,4 +306,138 @@ def test_send_note_block_with_image_refs_embeds_and_keeps_original(mock_client,
 
     # History keeps the original message with @image:id
     updated = test_session.get(Note, note.id)
-    assert updated.history["content"][0]["content"] == msg.block
\ No newline at end of file
+    assert updated.history["content"][0]["content"] == msg.block
+
+@patch("backend.services.notes_service.client")
+def test_send_note_block_resolves_multiple_image_refs(mock_client, test_session, temp_directory):
+    note = Note(name="Multi Image Note", history={"content": []})
+    other_note = Note(name="Other Note", history={"content": []})
+    test_session.add(note)
+    test_session.add(other_note)
+    test_session.commit()
+    test_session.refresh(note)
+    test_session.refresh(other_note)
+
+    images = []
+    for owner, name in [(note, "a.png"), (note, "b.png"), (other_note, "c.png")]:
+        img_path = temp_directory / name
+        img_path.write_bytes(name.encode())
+        image = NoteImage(
+            note_id=owner.id,
+            filename=name,
+            original_filename=name,
+            file_path=str(img_path),
+            mime_type="image/png",
+            file_size=len(name),
+        )
+        test_session.add(image)
+        images.append(image)
+    test_session.commit()
+    for image in images:
+        test_session.refresh(image)
+
+    mock_client.chat.completions.create.return_value = [stream_chunk("OK")]
+
+    first, second, foreign = images
+    msg = NoteBlockCreate(block=f"@image:{second.id} then @image:{first.id} and @image:{foreign.id}")
+    done_payload(send_note_block(test_session, note.id, msg))
+
+    last = mock_client.chat.completions.create.call_args[1]["messages"][-1]
+    # Images are embedded in reference order; images of other notes are ignored
+    assert last["content"][0]["text"] == f"[Image: b.png] then [Image: a.png] and @image:{foreign.id}"
+    urls = [part["image_url"]["url"] for part in last["content"][1:]]
+    assert urls == [
+        "data:image/png;base64," + base64.b64encode(b"b.png").decode(),
+        "data:image/png;base64," + base64.b64encode(b"a.png").decode(),
+    ]
+
+
+@patch("backend.services.notes_service.client")
+def test_send_note_block_does_not_rewrite_longer_image_ids(mock_client, test_session, temp_directory):
+    note = Note(name="Prefix Note", history={"content": []})
+    test_session.add(note)
+    test_session.commit()
+    test_session.refresh(note)
+
+    img_path = temp_directory / "a.png"
+    img_path.write_bytes(b"a.png")
+    image = NoteImage(
+        note_id=note.id,
+        filename="a.png",
+        original_filename="a.png",
+        file_path=str(img_path),
+        mime_type="image/png",
+        file_size=5,
+    )
+    test_session.add(image)
+    test_session.commit()
+    test_session.refresh(image)
+
+    mock_client.chat.completions.create.return_value = [stream_chunk("OK")]
+
+    # "@image:<id>0" references a different, unknown image and must stay as written
+    done_payload(send_note_block(test_session, note.id, NoteBlockCreate(block=f"@image:{image.id} vs @image:{image.id}0")))
+
+    last = mock_client.chat.completions.create.call_args[1]["messages"][-1]
+    assert last["content"][0]["text"] == f"[Image: a.png] vs @image:{image.id}0"
+    assert len(last["content"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_upload_identical_images_share_one_file(test_session, temp_directory, monkeypatch):
+    monkeypatch.setattr(notes_service, "UPLOAD_DIR", temp_directory, raising=False)
+
+    notes = [Note(name=f"Dedupe {i}", history={"content": []}) for i in range(2)]
+    test_session.add_all(notes)
+    test_session.commit()
+
+    responses = []
+    for note in notes:
+        upload = UploadFile(
+            filename="same.png",
+            file=io.BytesIO(b"same image bytes"),
+            headers=Headers({"content-type": "image/png"}),
+        )
+        responses.append(await upload_note_image(test_session, note.id, upload))
+
+    first, second = (test_session.get(NoteImage, resp.id) for resp in responses)
+    assert first.id != second.id
+    assert first.file_path == second.file_path
+    assert list(temp_directory.iterdir()) == [Path(first.file_path)]
+
+    # The shared file outlives the first delete and goes with the last one
+    file_path = first.file_path
+    delete_note_image(test_session, notes[0].id, first.id)
+    assert os.path.exists(file_path)
+    delete_note_image(test_session, notes[1].id, second.id)
+    assert not os.path.exists(file_path)
+
+
+@pytest.mark.asyncio
+async def test_upload_commit_failure_keeps_only_shared_files(test_session, temp_directory, monkeypatch):
+    monkeypatch.setattr(notes_service, "UPLOAD_DIR", temp_directory, raising=False)
+
+    note = Note(name="Failed Insert", history={"content": []})
+    test_session.add(note)
+    test_session.commit()
+
+    def make_upload(content: bytes) -> UploadFile:
+        return UploadFile(
+            filename="image.png",
+            file=io.BytesIO(content),
+            headers=Headers({"content-type": "image/png"}),
+        )
+
+    existing = await upload_note_image(test_session, note.id, make_upload(b"shared bytes"))
+    shared_path = test_session.get(NoteImage, existing.id).file_path
+
+    def failing_commit():
+        raise RuntimeError("insert failed")
+
+    monkeypatch.setattr(test_session, "commit", failing_commit)
+
+    # A file still referenced by another image stays; a new one is removed with its row
+    for content in (b"shared bytes", b"new bytes"):
+        with pytest.raises(RuntimeError):
+            await upload_note_image(test_session, note.id, make_upload(content))
+    assert list(temp_directory.iterdir()) == [Path(shared_path)]
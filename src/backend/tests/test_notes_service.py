@@ -1,11 +1,18 @@
 import pytest
+from datetime import timedelta
 from unittest.mock import patch
 from fastapi import HTTPException
+from sqlmodel import Session, select
 
 from backend.services.notes_service import (
-    create_note, get_note_list, get_note, delete_note, send_note_block
+    create_note, get_note_list, get_note, delete_note, send_note_block,
+    send_question, update_note_block, delete_note_block, RESPONSE_CACHE_TTL
 )
-from backend.models.note import Note, NoteListResponse, NoteBlockCreate
+from backend.models.note import (
+    Note, NoteListResponse, NoteBlockCreate, NoteBlockUpdate, NoteResponseCache, QuestionCreate,
+    utc_now
+)
+from backend.tests.conftest import done_payload, stream_chunk
 
 
 class TestNotesService:
@@ -137,21 +144,14 @@ class TestNotesService:
         test_session.commit()
         test_session.refresh(note)
         
-        # Mock AI client response
-        class MockChunk:
-            def __init__(self, content):
-                self.choices = [type('obj', (object,), {
-                    'delta': type('obj', (object,), {'content': content})()
-                })()]
-        
         mock_client.chat.completions.create.return_value = [
-            MockChunk("Hello! "),
-            MockChunk("How can I "),
-            MockChunk("help you today?")
+            stream_chunk("Hello! "),
+            stream_chunk("How can I "),
+            stream_chunk("help you today?")
         ]
         
         message = NoteBlockCreate(block="Hello there", is_note=False)
-        result = send_note_block(test_session, note.id, message)
+        result = done_payload(send_note_block(test_session, note.id, message))
 
         # Verify response structure
         assert result['status'] == 'ok'
@@ -177,6 +177,31 @@ class TestNotesService:
         assert second_message["content"] == "Hello! How can I help you today?"
         assert second_message["id"] == 2
     
+    @patch('backend.services.notes_service.client')
+    def test_send_note_block_releases_connection_during_generation(self, mock_client, test_session, sample_notes):
+        """Test that no transaction is held open while the model generates, with the user's block committed."""
+        note = sample_notes[2]
+        test_session.add(note)
+        test_session.commit()
+        
+        in_transaction = []
+        committed = []
+        def create(**kwargs):
+            in_transaction.append(test_session.in_transaction())
+            # The committed block id counter comes with the block that uses it
+            with Session(test_session.get_bind()) as other_session:
+                saved = other_session.get(Note, note.id)
+                committed.append((saved.max_message_id, [block['id'] for block in saved.history['content']]))
+            return [stream_chunk("Hi")]
+        mock_client.chat.completions.create.side_effect = create
+        
+        result = done_payload(send_note_block(test_session, note.id, NoteBlockCreate(block="Hello", is_note=False)))
+        
+        assert in_transaction == [False]
+        assert committed == [(1, [1])]
+        assert [block['id'] for block in result['new_note_blocks']] == [1, 2]
+        assert test_session.get(Note, note.id).max_message_id == 2
+    
     def test_send_note_block_note_message(self, test_session, sample_notes):
         """Test sending note message (no AI response)."""
         # Add a note to database
@@ -186,7 +211,7 @@ class TestNotesService:
         test_session.refresh(note)
         
         message = NoteBlockCreate(block="This is my note about the lesson", is_note=True)
-        result = send_note_block(test_session, note.id, message)
+        result = done_payload(send_note_block(test_session, note.id, message))
 
         # Notes should not trigger AI response
         assert result['status'] == 'ok'
@@ -220,7 +245,7 @@ class TestNotesService:
         test_session.refresh(note)
         
         message = NoteBlockCreate(block="First message", is_note=True)
-        send_note_block(test_session, note.id, message)
+        done_payload(send_note_block(test_session, note.id, message))
         
         # Verify history was initialized
         updated_note = test_session.get(Note, note.id)
@@ -250,6 +275,12 @@ class TestNotesService:
             send_note_block(test_session, note.id, message)
         
         assert "AI Service Error" in str(exc_info.value)
+
+        # The user's block is kept even though no reply was generated
+        test_session.expire_all()
+        updated_note = test_session.get(Note, note.id)
+        assert updated_note.history["content"][-1]["content"] == "Hello"
+        assert updated_note.max_message_id == 1
     
     @patch('backend.services.notes_service.client')
     def test_send_note_block_appends_to_existing_history(self, mock_client, test_session, sample_notes):
@@ -262,17 +293,10 @@ class TestNotesService:
         
         initial_length = len(note.history["content"])
         
-        # Mock AI response
-        class MockChunk:
-            def __init__(self, content):
-                self.choices = [type('obj', (object,), {
-                    'delta': type('obj', (object,), {'content': content})()
-                })()]
-        
-        mock_client.chat.completions.create.return_value = [MockChunk("Great question!")]
+        mock_client.chat.completions.create.return_value = [stream_chunk("Great question!")]
         
         message = NoteBlockCreate(block="Can you help me?", is_note=False)
-        send_note_block(test_session, note.id, message)
+        done_payload(send_note_block(test_session, note.id, message))
         
         # Verify new messages were appended
         updated_note = test_session.get(Note, note.id)
@@ -289,6 +313,245 @@ class TestNotesService:
         assert new_ai_msg["content"] == "Great question!"
         assert new_ai_msg["id"] == 2
     
+    @patch('backend.services.notes_service.client')
+    def test_send_note_block_summarizes_old_history(self, mock_client, test_session):
+        """Test that blocks beyond the history window are folded into a stored summary."""
+        blocks = [
+            {"id": i, "role": "user" if i % 2 else "assistant", "content": f"block {i}"}
+            for i in range(1, 41)
+        ]
+        note = Note(name="Long Note", history={"content": blocks}, max_message_id=40)
+        test_session.add(note)
+        test_session.commit()
+        test_session.refresh(note)
+
+        def create(messages, model, stream=False, **kwargs):
+            if stream:
+                return [stream_chunk("Reply")]
+            return type('obj', (object,), {'choices': [type('obj', (object,), {
+                'message': type('obj', (object,), {'content': "Earlier summary"})()
+            })()]})()
+
+        mock_client.chat.completions.create.side_effect = create
+
+        done_payload(send_note_block(test_session, note.id, NoteBlockCreate(block="Next", is_note=False)))
+
+        summary_call, reply_call = mock_client.chat.completions.create.call_args_list
+        assert "block 20" in summary_call.kwargs["messages"][-1]["content"]
+        assert "block 21" not in summary_call.kwargs["messages"][-1]["content"]
+
+        # System prompt, summary, the 20 most recent blocks and the new block
+        messages = reply_call.kwargs["messages"]
+        assert len(messages) == 23
+        assert "Earlier summary" in messages[1]["content"]
+        assert messages[2]["content"] == "block 21"
+        assert messages[-1]["content"] == "Next"
+
+        updated_note = test_session.get(Note, note.id)
+        assert updated_note.history["summary"] == {"text": "Earlier summary", "last_block_id": 20}
+        assert len(updated_note.history["content"]) == 42
+
+    @patch('backend.services.notes_service.SUMMARY_BATCH', 2)
+    @patch('backend.services.notes_service.HISTORY_TOKEN_BUDGET', 10)
+    @patch('backend.services.notes_service.client')
+    def test_send_note_block_summarizes_history_over_token_budget(self, mock_client, test_session):
+        """Test that blocks over the token budget are folded into the summary in whole batches."""
+        blocks = [
+            {"id": i, "role": "user" if i % 2 else "assistant", "content": "x" * 15 + str(i)}
+            for i in range(1, 6)
+        ]
+        note = Note(name="Long Blocks", history={"content": blocks}, max_message_id=5)
+        test_session.add(note)
+        test_session.commit()
+
+        def create(messages, model, stream=False, **kwargs):
+            if stream:
+                return []
+            return type('obj', (object,), {'choices': [type('obj', (object,), {
+                'message': type('obj', (object,), {'content': "Earlier summary"})()
+            })()]})()
+
+        mock_client.chat.completions.create.side_effect = create
+
+        done_payload(send_note_block(test_session, note.id, NoteBlockCreate(block="Next", is_note=False)))
+
+        # 40 characters of budget push out the first three 16-character blocks,
+        # rounded up to two batches of two
+        summary_call, reply_call = mock_client.chat.completions.create.call_args_list
+        assert "x" * 15 + "4" in summary_call.kwargs["messages"][-1]["content"]
+        assert "x" * 15 + "5" not in summary_call.kwargs["messages"][-1]["content"]
+        messages = reply_call.kwargs["messages"]
+        assert "Earlier summary" in messages[1]["content"]
+        assert [message["content"] for message in messages[2:]] == ["x" * 15 + "5", "Next"]
+
+        test_session.expire_all()
+        assert test_session.get(Note, note.id).history["summary"] == {"text": "Earlier summary", "last_block_id": 4}
+
+    @patch('backend.services.notes_service.client')
+    def test_send_note_block_yields_deltas_then_persists(self, mock_client, test_session, sample_notes):
+        """Test that streamed deltas are sent as events and the reply saved at the end."""
+        note = sample_notes[2]  # Empty note
+        test_session.add(note)
+        test_session.commit()
+        test_session.refresh(note)
+
+        mock_client.chat.completions.create.return_value = [stream_chunk("Hola"), stream_chunk(None), stream_chunk(" amigo")]
+
+        events = send_note_block(test_session, note.id, NoteBlockCreate(block="Hi", is_note=False))
+
+        assert next(events) == 'event: delta\ndata: {"content":"Hola"}\n\n'
+        assert next(events) == 'event: delta\ndata: {"content":" amigo"}\n\n'
+        # Only the user's block is persisted until the stream completes
+        history = test_session.exec(select(Note.history).where(Note.id == note.id)).one()
+        assert [block["content"] for block in history["content"]] == ["Hi"]
+
+        done = next(events)
+        assert done.startswith("event: done\n")
+        assert '"content":"Hola amigo"' in done
+        assert list(events) == []
+
+        test_session.expire_all()
+        updated_note = test_session.get(Note, note.id)
+        assert [block["content"] for block in updated_note.history["content"]] == ["Hi", "Hola amigo"]
+
+    @patch('backend.services.notes_service.client')
+    def test_send_note_block_keeps_user_block_when_client_disconnects(self, mock_client, test_session, sample_notes):
+        """Test that closing the stream mid-reply keeps the user's block and its id."""
+        note = sample_notes[2]  # Empty note
+        test_session.add(note)
+        test_session.commit()
+
+        mock_client.chat.completions.create.return_value = [stream_chunk("Hola"), stream_chunk(" amigo")]
+
+        events = send_note_block(test_session, note.id, NoteBlockCreate(block="Hi", is_note=False))
+        next(events)
+        events.close()
+
+        test_session.expire_all()
+        updated_note = test_session.get(Note, note.id)
+        assert [block["content"] for block in updated_note.history["content"]] == ["Hi"]
+        assert updated_note.max_message_id == 1
+
+    @patch('backend.services.notes_service.client')
+    def test_send_note_block_reuses_cached_response(self, mock_client, test_session):
+        """Test that an identical prompt is answered from the response cache."""
+        notes = [Note(name="First", history={"content": []}), Note(name="Second", history={"content": []})]
+        for note in notes:
+            test_session.add(note)
+        test_session.commit()
+
+        mock_client.chat.completions.create.return_value = [stream_chunk("Hola!")]
+
+        first = done_payload(send_note_block(test_session, notes[0].id, NoteBlockCreate(block="Hi", is_note=False)))
+        second = done_payload(send_note_block(test_session, notes[1].id, NoteBlockCreate(block="Hi", is_note=False)))
+
+        # Same messages and model: the second note is answered without calling OpenAI
+        mock_client.chat.completions.create.assert_called_once()
+        assert first['new_note_blocks'][1]['content'] == "Hola!"
+        assert second['new_note_blocks'][1]['content'] == "Hola!"
+
+    @patch('backend.services.notes_service.client')
+    def test_send_note_block_regenerate_skips_cached_response(self, mock_client, test_session):
+        """Test that regenerating asks OpenAI again and replaces the cached reply."""
+        notes = [Note(name="First", history={"content": []}), Note(name="Second", history={"content": []})]
+        test_session.add_all(notes)
+        test_session.commit()
+
+        mock_client.chat.completions.create.side_effect = [[stream_chunk("Hola!")], [stream_chunk("Buenas!")]]
+
+        done_payload(send_note_block(test_session, notes[0].id, NoteBlockCreate(block="Hi")))
+        second = done_payload(send_note_block(test_session, notes[1].id, NoteBlockCreate(block="Hi", regenerate=True)))
+
+        assert mock_client.chat.completions.create.call_count == 2
+        assert second['new_note_blocks'][1]['content'] == "Buenas!"
+        assert test_session.exec(select(NoteResponseCache.response)).all() == ["Buenas!"]
+
+    @patch('backend.services.notes_service.client')
+    def test_send_note_block_purges_expired_cached_responses(self, mock_client, test_session):
+        """Test that caching a reply deletes entries older than the TTL."""
+        note = Note(name="Purge", history={"content": []})
+        test_session.add(note)
+        test_session.add(NoteResponseCache(
+            key="old", response="Stale", created_at=utc_now() - RESPONSE_CACHE_TTL - timedelta(minutes=1)
+        ))
+        test_session.add(NoteResponseCache(key="recent", response="Fresh", created_at=utc_now()))
+        test_session.commit()
+
+        mock_client.chat.completions.create.return_value = [stream_chunk("Hola!")]
+
+        done_payload(send_note_block(test_session, note.id, NoteBlockCreate(block="Hi")))
+
+        assert sorted(test_session.exec(select(NoteResponseCache.response)).all()) == ["Fresh", "Hola!"]
+
+    @patch('backend.services.question.openai_provider.OpenAIProvider.generate_response')
+    def test_send_question_appends_qa_block(self, mock_generate, test_session):
+        """Test that a Q&A block is appended to the stored history."""
+        note = Note(
+            name="Question Note",
+            history={"content": [{"id": 1, "role": "user", "content": "Ser vs estar", "is_note": True}]},
+            max_message_id=1
+        )
+        test_session.add(note)
+        test_session.commit()
+        mock_generate.return_value = "When to use ser?\nUse ser for identity."
+
+        result = send_question(test_session, note.id, QuestionCreate(question="ser?", parent_note_block_id=1))
+
+        assert result['qa_block']['id'] == 2
+        assert result['qa_block']['question_title'] == "When to use ser?"
+        stored = test_session.exec(select(Note.history).where(Note.id == note.id)).one()
+        assert [block['id'] for block in stored['content']] == [1, 2]
+        assert stored['content'][1]['block_type'] == "qa_response"
+        assert test_session.get(Note, note.id).max_message_id == 2
+
+    def _note_with_blocks(self, test_session) -> Note:
+        note = Note(
+            name="Blocks Note",
+            history={"content": [
+                {"id": 1, "role": "user", "content": "First", "is_note": True},
+                {"id": 2, "role": "assistant", "content": "Second"},
+                {"id": 3, "role": "user", "content": "Third"},
+            ]},
+            max_message_id=3
+        )
+        test_session.add(note)
+        test_session.commit()
+        return note
+
+    def test_update_note_block_changes_only_that_block(self, test_session):
+        """Test that updating a block rewrites its content and leaves the others intact."""
+        note = self._note_with_blocks(test_session)
+
+        update_note_block(test_session, note.id, 2, NoteBlockUpdate(block="Edited @image:7"))
+
+        stored = test_session.exec(select(Note.history).where(Note.id == note.id)).one()
+        assert [block['content'] for block in stored['content']] == ["First", "Edited @image:7", "Third"]
+        assert stored['content'][1]['image_ids'] == [7]
+        assert stored['content'][1]['role'] == "assistant"
+        assert stored['content'][1]['updated_at']
+        assert 'updated_at' not in stored['content'][0]
+
+    def test_update_note_block_not_found(self, test_session):
+        """Test updating a missing block raises 404 and leaves history unchanged."""
+        note = self._note_with_blocks(test_session)
+
+        with pytest.raises(HTTPException) as exc_info:
+            update_note_block(test_session, note.id, 99, NoteBlockUpdate(block="Nope"))
+
+        assert exc_info.value.status_code == 404
+        stored = test_session.exec(select(Note.history).where(Note.id == note.id)).one()
+        assert [block['id'] for block in stored['content']] == [1, 2, 3]
+
+    def test_delete_note_block_removes_only_that_block(self, test_session):
+        """Test that deleting a block keeps the remaining blocks in order."""
+        note = self._note_with_blocks(test_session)
+
+        delete_note_block(test_session, note.id, 2)
+        delete_note_block(test_session, note.id, 99)
+
+        stored = test_session.exec(select(Note.history).where(Note.id == note.id)).one()
+        assert [block['id'] for block in stored['content']] == [1, 3]
+
     def test_create_multiple_notes(self, test_session):
         """Test creating multiple notes in the same session."""
         notes_data = [
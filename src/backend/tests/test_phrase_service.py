@@ -4,6 +4,7 @@ from fastapi import HTTPException
 
 from backend.services.phrase_service import (
     get_phrase_with_example_and_translation,
+    translate_phrase_and_example_with_google,
 )
 
 
@@ -111,6 +112,32 @@ class TestPhraseService:
                 use_gpt_translation=True
             )
 
+    @patch('backend.services.phrase_service.save_generated_sentence')
+    @patch('backend.services.phrase_service.generate_example_sentence_with_gpt')
+    @patch('backend.services.phrase_service.search_for_sentences')
+    def test_get_phrase_with_example_and_translation_collects_generated_sentence(
+        self, mock_search, mock_generate, mock_save, test_session
+    ):
+        """Test that a generated sentence is handed to the caller instead of being saved."""
+        mock_search.return_value = []
+        mock_generate.return_value = {
+            "example_phrase": "Hola mundo",
+            "phrase_translation": "hello",
+            "example_translation": "Hello world",
+        }
+        generated = []
+
+        result = get_phrase_with_example_and_translation(
+            phrase="hola",
+            language="es",
+            session=test_session,
+            generated_sentences=generated
+        )
+
+        assert result["example_phrase"] == "Hola mundo"
+        assert generated == ["Hola mundo"]
+        mock_save.assert_not_called()
+
     @patch('backend.services.phrase_service.search_for_sentences')
     @patch('backend.services.phrase_service.GoogleTranslateHelper')
     def test_get_phrase_with_example_and_translation_translation_error(self, mock_translate_helper, mock_search,test_session):
@@ -168,3 +195,25 @@ class TestPhraseService:
 
             assert result["word"] == "hello"
             assert "word_translation" in result
+
+    @pytest.mark.parametrize("translation, expected", [
+        (
+            "<phrase> hello </phrase> <phrase_example>Hello,\nhow are you?</phrase_example>",
+            {"phrase_translation": "hello", "example_translation": "Hello,\nhow are you?"},
+        ),
+        (
+            "<phrase>good morning</phrase> Good morning, friend",
+            {"phrase_translation": "good morning", "example_translation": ""},
+        ),
+        (
+            "Good morning <phrase_example>Good morning, friend</phrase_example>",
+            {"phrase_translation": "", "example_translation": "Good morning, friend"},
+        ),
+    ])
+    @patch('backend.services.phrase_service.GoogleTranslateHelper')
+    def test_translate_phrase_and_example_with_google_parses_tags(self, mock_translate_helper, translation, expected):
+        mock_translate_helper.return_value.translate.return_value = translation
+
+        result = translate_phrase_and_example_with_google("buenos días", "Buenos días, amigo")
+
+        assert result == expected
@@ -6,10 +6,12 @@ Consolidated and optimized version with reduced redundancy.
 import pytest
 from unittest.mock import patch
 from sqlmodel import select
+from sqlalchemy import event
 
 from backend.services.dict_spanish_service import (
     SpanishDictClient, parse_spanish_word_data, parse_audio_info,
-    parse_conjugation_data, get_spanish_word_definition
+    parse_conjugation_data, get_spanish_word_definition, dump_spanish_word_data,
+    load_cached_spanish_word_data
 )
 from backend.models.dict_spanish import (
     SpanishDictionary, SpanishWordDefinition, SpanishWordEntry,
@@ -82,7 +84,7 @@ class TestSpanishDictClient:
         class MockResponse:
             def __init__(self, word):
                 import json
-                self.text = f'<html><script>window.SD_COMPONENT_DATA = {json.dumps(sd_component_data)};</script></html>'
+                self.content = f'<html><script>window.SD_COMPONENT_DATA = {json.dumps(sd_component_data)};</script></html>'.encode()
                 self.status_code = 200
             def raise_for_status(self):
                 pass
@@ -115,7 +117,7 @@ class TestSpanishDictClient:
         class MockResponse:
             def __init__(self, status_code):
                 self.status_code = status_code
-                self.text = ""
+                self.content = b""
             def raise_for_status(self):
                 raise Exception(f"HTTP Error {self.status_code}")
         
@@ -126,6 +128,17 @@ class TestSpanishDictClient:
             client.get_word_data("test")
         assert error_msg in str(exc_info.value)
     
+    def test_extract_initial_state_with_trailing_script(self):
+        """Test that the component JSON is found when more code follows it in the script."""
+        content = (
+            b'<html><script>window.SD_COMPONENT_DATA = {"verb": {"infinitive": "ser", "note": "};"}};'
+            b' window.SD_OTHER = {"x": 1};</script></html>'
+        )
+
+        data = SpanishDictClient()._extract_initial_state(content)
+
+        assert data == {"verb": {"infinitive": "ser", "note": "};"}}
+
     @pytest.mark.parametrize("verb", ["hablar", "correr", "ser"])
     @patch('requests.Session.get')
     def test_get_conjugations_success(self, mock_get, verb):
@@ -158,7 +171,7 @@ class TestSpanishDictClient:
         class MockResponse:
             def __init__(self, verb):
                 import json
-                self.text = f'<html><script>window.SD_COMPONENT_DATA = {json.dumps(sd_component_data)};</script></html>'
+                self.content = f'<html><script>window.SD_COMPONENT_DATA = {json.dumps(sd_component_data)};</script></html>'.encode()
                 self.status_code = 200
             def raise_for_status(self):
                 pass
@@ -227,6 +240,26 @@ class TestSpanishWordDefinitionServiceWithRealFixtures:
             assert definition.spanish_audio.text == word
             assert definition.spanish_audio.lang == "es"
     
+    def test_conjugation_data_not_loaded_unless_requested(self, test_engine, test_session, real_spanish_dict_fixtures):
+        """Test that cached conjugation payloads are only selected when conjugations are requested."""
+        self.setup_real_dictionary_entries(test_session, real_spanish_dict_fixtures, ["correr"])
+        test_session.expunge_all()
+
+        statements = []
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+        event.listen(test_engine, "before_cursor_execute", record)
+        try:
+            result = get_spanish_word_definition(["correr"], session=test_session, read_only=True)
+        finally:
+            event.remove(test_engine, "before_cursor_execute", record)
+
+        assert result[0].conjugations is None
+        assert statements and all("conjugation_data" not in stmt for stmt in statements)
+
+        result = get_spanish_word_definition(["correr"], include_conjugations=True, session=test_session, read_only=True)
+        assert result[0].conjugations is not None
+
     def test_nonexistent_word_returns_empty_definition(self, test_session):
         """Test that nonexistent words return empty definitions in read_only mode."""
         result = get_spanish_word_definition(["nonexistent"], session=test_session, read_only=True)
@@ -267,6 +300,66 @@ class TestSpanishWordDefinitionServiceWithRealFixtures:
         assert result_cached[0].word == word
         mock_get_word_data.assert_not_called()
     
+    @patch('backend.services.dict_spanish_service.SpanishDictClient.get_word_data')
+    @patch('backend.services.dict_spanish_service.SpanishDictClient.get_conjugations')
+    def test_multiple_uncached_words_fetched_and_cached(self, mock_get_conjugations, mock_get_word_data,
+                                                        test_session, real_spanish_dict_fixtures):
+        """Test that several cache misses are all fetched, returned in order and cached."""
+        words = ["hablar", "hola", "correr"]
+        fixtures = {word: real_spanish_dict_fixtures.load_complete_word_data(word) for word in words}
+        mock_get_word_data.side_effect = lambda word: fixtures[word]
+        # Conjugation pages of uncached words are fetched alongside their word pages
+        mock_get_conjugations.side_effect = (
+            lambda word: {} if word == "hola" else real_spanish_dict_fixtures.load_conjugations(word)
+        )
+
+        result = get_spanish_word_definition(words, include_conjugations=True, session=test_session)
+
+        assert [definition.word for definition in result] == words
+        assert sorted(call.args[0] for call in mock_get_word_data.call_args_list) == sorted(words)
+        assert sorted(call.args[0] for call in mock_get_conjugations.call_args_list) == sorted(words)
+        assert result[0].conjugations is not None
+        assert result[1].conjugations is None
+
+        cached = test_session.exec(select(SpanishDictionary).where(SpanishDictionary.word.in_(words))).all()
+        assert sorted(entry.word for entry in cached) == sorted(words)
+
+    @patch('backend.services.dict_spanish_service.SpanishDictClient.get_word_data')
+    @patch('backend.services.dict_spanish_service.SpanishDictClient.get_conjugations')
+    def test_failed_conjugation_prefetch_is_retried(self, mock_get_conjugations, mock_get_word_data,
+                                                    test_session, real_spanish_dict_fixtures):
+        """Test that a verb whose prefetched conjugations failed is fetched again."""
+        mock_get_word_data.return_value = real_spanish_dict_fixtures.load_complete_word_data("hablar")
+        mock_get_conjugations.side_effect = [
+            Exception("Timeout"), real_spanish_dict_fixtures.load_conjugations("hablar")
+        ]
+
+        result = get_spanish_word_definition(["hablar"], include_conjugations=True, session=test_session)
+
+        assert mock_get_conjugations.call_count == 2
+        assert result[0].conjugations.infinitive == "hablar"
+
+    @patch('backend.services.dict_spanish_service.SpanishDictClient.get_conjugations')
+    def test_conjugations_added_to_cached_entry(self, mock_get_conjugations, test_session, real_spanish_dict_fixtures):
+        """Test that conjugations fetched for a cached verb are stored on its existing row."""
+        word_data, audio_data = real_spanish_dict_fixtures.load_complete_word_data("hablar")
+        test_session.add(SpanishDictionary(
+            word="hablar",
+            word_data=dump_spanish_word_data(parse_spanish_word_data(word_data)),
+            audio_data=audio_data
+        ))
+        test_session.commit()
+        mock_get_conjugations.return_value = real_spanish_dict_fixtures.load_conjugations("hablar")
+
+        result = get_spanish_word_definition(["hablar"], include_conjugations=True, session=test_session)
+
+        assert result[0].conjugations.infinitive == "hablar"
+        mock_get_conjugations.assert_called_once_with("hablar")
+        stored = test_session.exec(
+            select(SpanishDictionary.conjugation_data).where(SpanishDictionary.word == "hablar")
+        ).all()
+        assert stored == [mock_get_conjugations.return_value]
+
     @patch('backend.services.dict_spanish_service.SpanishDictClient.get_word_data')
     def test_api_failure_raises_exception(self, mock_get_word_data, test_session):
         """Test that API failures properly raise exceptions."""
@@ -498,6 +591,40 @@ class TestRealSpanishDictPayloads:
         assert spanish_audio.lang == "es"
         assert spanish_audio.audio_url is not None
     
+    def test_dump_word_data_omits_defaults_and_round_trips(self, real_spanish_dict_fixtures):
+        """Test that cached word data drops default fields but parses back identically."""
+        word_data, _ = real_spanish_dict_fixtures.load_complete_word_data("casa")
+        entries = parse_spanish_word_data(word_data)
+
+        dumped = dump_spanish_word_data(entries)
+        full = [entry.model_dump() for entry in entries]
+
+        assert len(str(dumped)) < len(str(full))
+        assert "synonyms" not in dumped[0]["pos_groups"][0]["senses"][0]
+        assert [SpanishWordEntry(**entry) for entry in dumped] == entries
+
+    def test_load_cached_word_data_matches_validated_entries(self, real_spanish_dict_fixtures):
+        """Test that cached entries rebuilt without validation equal the validated ones."""
+        word_data, _ = real_spanish_dict_fixtures.load_complete_word_data("correr")
+        entries = parse_spanish_word_data(word_data)
+
+        loaded = load_cached_spanish_word_data(dump_spanish_word_data(entries))
+
+        assert loaded == entries
+        assert isinstance(loaded[0].pos_groups[0].senses[0], Sense)
+        assert SpanishWordDefinition(word="correr", entries=loaded).get_examples()
+
+    def test_get_examples_is_cached_on_instance(self, real_spanish_dict_fixtures):
+        """Test that get_examples flattens examples once and reuses the result."""
+        word_data, _ = real_spanish_dict_fixtures.load_complete_word_data("correr")
+        definition = SpanishWordDefinition(word="correr", entries=parse_spanish_word_data(word_data))
+
+        examples = definition.get_examples()
+
+        assert len(examples) > 0
+        assert all(isinstance(example, Example) for example in examples)
+        assert definition.get_examples() is examples
+
     @pytest.mark.parametrize("verb", ["correr", "ser", "hablar"])
     def test_parse_real_conjugations(self, real_spanish_dict_fixtures, verb):
         """Test parsing real conjugation data for various verbs."""
@@ -82,11 +82,49 @@ export const createNewNote = async () => {
   }
 };
 
+// Read a server-sent event stream, calling onEvent(event, data) with each event's parsed JSON data
+const readEventStream = async (response, onEvent) => {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const lines = buffer.slice(0, boundary).split('\n');
+      buffer = buffer.slice(boundary + 2);
+      const event = lines.find(line => line.startsWith('event: '))?.slice(7) ?? 'message';
+      const data = lines.filter(line => line.startsWith('data: ')).map(line => line.slice(6)).join('\n');
+      onEvent(event, JSON.parse(data));
+    }
+  }
+};
+
 // Send a note block using POST /api/coach/notes/{id}/block
-export const sendNoteBlock = async (noteId, data) => {
+// The reply streams as server-sent events: `delta` events carry {content} chunks as the
+// assistant generates, and the final `done` event carries {status, new_note_blocks}.
+// axios can't read a streamed body in the browser, so this uses fetch.
+export const sendNoteBlock = async (noteId, data, onDelta = () => {}) => {
   try {
-    const response = await api.post(`coach/notes/${noteId}/block`, data);
-    return response.data.new_note_blocks;
+    const response = await fetch(`${API_BASE_URL}coach/notes/${noteId}/block`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(data),
+    });
+    if (!response.ok) {
+      throw new Error(`Request failed with status ${response.status}`);
+    }
+    let newNoteBlocks = [];
+    await readEventStream(response, (event, payload) => {
+      if (event === 'delta') {
+        onDelta(payload.content);
+      } else if (event === 'done') {
+        newNoteBlocks = payload.new_note_blocks;
+      }
+    });
+    return newNoteBlocks;
   } catch (error) {
     console.error('Error sending note block:', error);
     return 'Sorry, something went wrong.';